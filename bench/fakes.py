@@ -0,0 +1,196 @@
+# bench/fakes.py
+
+import asyncio
+import bisect
+import random
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import discord
+from discord.utils import time_snowflake
+
+# 합성 메시지 본문에 사용할 어휘
+VOCABULARY = (
+    "회의", "일정", "배포", "릴리즈", "버그", "수정", "확인", "리뷰", "테스트", "서버", "데이터베이스",
+    "요약", "내일", "오늘", "다음주", "결정", "논의", "문서", "디자인", "API", "성능", "장애", "모니터링",
+    "좋아요", "네", "아니요", "그럼", "진행", "완료", "검토", "공유", "질문", "답변", "계획", "목표",
+)
+
+
+@dataclass
+class ChannelSpec:
+    """합성 채널 설정"""
+    messages_per_hour: float = 300
+    avg_length: int = 60
+    authors: int = 20
+    bot_ratio: float = 0.05
+    seed: int = 42
+
+
+class FakeAuthor:
+    def __init__(self, user_id, display_name, bot=False):
+        self.id = user_id
+        self.display_name = display_name
+        self.name = display_name
+        self.bot = bot
+        self.avatar = None
+        self.mention = f"<@{user_id}>"
+
+    def __str__(self):
+        return self.display_name
+
+
+class FakeMessage:
+    __slots__ = ("id", "created_at", "author", "content")
+
+    def __init__(self, message_id, created_at, author, content):
+        self.id = message_id
+        self.created_at = created_at
+        self.author = author
+        self.content = content
+
+    async def edit(self, **kwargs):
+        return self
+
+
+def generate_messages(spec: ChannelSpec, start: datetime, end: datetime) -> list:
+    """[start, end) 구간에 균등 분포된 합성 메시지를 오래된 순으로 생성합니다."""
+    rng = random.Random(spec.seed)
+    hours = (end - start).total_seconds() / 3600
+    count = int(spec.messages_per_hour * hours)
+    humans = [FakeAuthor(1000 + i, f"user{i}") for i in range(spec.authors)]
+    # 소수의 작성자가 대부분의 메시지를 쓰는 분포 (Zipf 유사)
+    weights = [1 / (i + 1) for i in range(spec.authors)]
+    bot = FakeAuthor(1, "summary-bot", bot=True)
+
+    start_ts = start.timestamp()
+    span = (end - start).total_seconds()
+    timestamps = sorted(start_ts + rng.random() * span for _ in range(count))
+    messages = []
+    for seq, ts in enumerate(timestamps):
+        created_at = datetime.fromtimestamp(ts, tz=timezone.utc)
+        author = bot if rng.random() < spec.bot_ratio else rng.choices(humans, weights)[0]
+        length = max(1, int(rng.expovariate(1 / spec.avg_length)))
+        words = []
+        size = 0
+        while size < length:
+            word = rng.choice(VOCABULARY)
+            words.append(word)
+            size += len(word) + 1
+        # 같은 밀리초의 메시지도 고유 ID를 갖도록 하위 비트에 순번 추가
+        message_id = time_snowflake(created_at) + (seq & 0x3FFFFF)
+        messages.append(FakeMessage(message_id, created_at, author, " ".join(words)))
+    return messages
+
+
+class FakeThread:
+    def __init__(self, parent, name):
+        self.id = time_snowflake(datetime.now(timezone.utc))
+        self.parent = parent
+        self.name = name
+        self.jump_url = f"https://discord.com/channels/{parent.guild_id}/{self.id}"
+        self.sent = []
+
+    async def add_user(self, user):
+        await asyncio.sleep(0)
+
+    async def send(self, *args, **kwargs):
+        self.sent.append((args, kwargs))
+        return FakeMessage(0, datetime.now(timezone.utc), None, args[0] if args else "")
+
+    async def edit(self, **kwargs):
+        return self
+
+
+class FakeTextChannel(discord.TextChannel):
+    """
+    discord.TextChannel 을 흉내내는 합성 채널.
+    isinstance 검사를 통과하도록 TextChannel 을 상속하지만 게이트웨이 상태 없이 동작합니다.
+    history() 는 100개 단위 페이지마다 page_latency 만큼 대기해 REST 호출을 흉내냅니다.
+    """
+
+    def __init__(self, channel_id, guild_id, messages, page_latency=0.0):
+        self.id = channel_id
+        self.guild_id = guild_id
+        self.name = f"bench-{channel_id}"
+        self.messages = messages
+        self._ids = [message.id for message in messages]
+        self.page_latency = page_latency
+        self.pages_fetched = 0
+        self.created_threads = []
+
+    def __repr__(self):
+        return f"<FakeTextChannel id={self.id} messages={len(self.messages)}>"
+
+    @staticmethod
+    def _to_snowflake(value, upper):
+        if value is None:
+            return None
+        if isinstance(value, datetime):
+            # before 는 해당 시각 이전, after 는 해당 시각 이후의 메시지를 의미
+            return time_snowflake(value, high=not upper)
+        return value.id
+
+    @property
+    def last_message_id(self):
+        return self._ids[-1] if self._ids else None
+
+    async def history(self, limit=100, before=None, after=None, oldest_first=None):
+        lo = 0
+        hi = len(self._ids)
+        after_id = self._to_snowflake(after, upper=False)
+        before_id = self._to_snowflake(before, upper=True)
+        if after_id is not None:
+            lo = bisect.bisect_right(self._ids, after_id)
+        if before_id is not None:
+            hi = bisect.bisect_left(self._ids, before_id)
+        if oldest_first is None:
+            oldest_first = after is not None
+        indices = range(lo, hi) if oldest_first else range(hi - 1, lo - 1, -1)
+
+        yielded = 0
+        for position, index in enumerate(indices):
+            if limit is not None and yielded >= limit:
+                return
+            if position % 100 == 0:
+                self.pages_fetched += 1
+                await asyncio.sleep(self.page_latency)
+            yielded += 1
+            yield self.messages[index]
+
+    async def create_thread(self, *, name, type=None, invitable=True, reason=None, **kwargs):
+        thread = FakeThread(self, name)
+        self.created_threads.append(thread)
+        await asyncio.sleep(0)
+        return thread
+
+
+class FakeFollowup:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, content=None, **kwargs):
+        self.sent.append((content, kwargs))
+        return FakeMessage(0, datetime.now(timezone.utc), None, content)
+
+
+class FakeResponse:
+    def is_done(self):
+        return True
+
+    async def defer(self, **kwargs):
+        pass
+
+
+class FakeGuild:
+    def __init__(self, guild_id):
+        self.id = guild_id
+
+
+class FakeInteraction:
+    def __init__(self, channel, user):
+        self.channel = channel
+        self.user = user
+        self.guild = FakeGuild(channel.guild_id)
+        self.followup = FakeFollowup()
+        self.response = FakeResponse()
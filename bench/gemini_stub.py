@@ -0,0 +1,74 @@
+# bench/gemini_stub.py
+
+import asyncio
+import json
+import random
+
+from aiohttp import web
+
+
+class GeminiStub:
+    """
+    Gemini generateContent 엔드포인트를 흉내내는 로컬 aiohttp 서버.
+    응답 지연(평균/지터)과 오류 비율을 주입할 수 있으며 호출 수와 토큰 수를 집계합니다.
+    """
+
+    def __init__(self, latency=0.2, jitter=0.05, error_rate=0.0, error_status=503, seed=7):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._rng = random.Random(seed)
+        self._runner = None
+        self.url = None
+        self.calls = 0
+        self.errors = 0
+        self.prompt_chars = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def _handle(self, request):
+        body = await request.json()
+        prompt = body.get("prompt", {}).get("text", "")
+        self.calls += 1
+        self.prompt_chars += len(prompt)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            delay = max(0.0, self._rng.gauss(self.latency, self.jitter))
+            await asyncio.sleep(delay)
+            if self._rng.random() < self.error_rate:
+                self.errors += 1
+                return web.Response(status=self.error_status, text="stub error")
+            # 입력 길이에 비례하는 짧은 요약을 돌려줌
+            lines = max(1, min(20, len(prompt) // 400))
+            content = "\n".join(f"- 요약 항목 {i + 1}" for i in range(lines))
+            payload = {
+                "candidates": [{"output": {"content": content}}],
+                "usageMetadata": {"promptTokenCount": len(prompt) // 2, "candidatesTokenCount": len(content) // 2},
+            }
+            return web.Response(text=json.dumps(payload, ensure_ascii=False), content_type="application/json")
+        finally:
+            self.in_flight -= 1
+
+    async def start(self, host="127.0.0.1", port=0):
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post("/v1beta/models/{model}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{bound_port}/v1beta/models/stub:generateContent"
+        return self.url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def reset(self):
+        self.calls = 0
+        self.errors = 0
+        self.prompt_chars = 0
+        self.max_in_flight = 0
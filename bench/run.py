@@ -0,0 +1,295 @@
+# bench/run.py
+"""
+오프라인 엔드투엔드 벤치마크.
+
+합성 채널(FakeTextChannel), 로컬 Gemini 스텁 서버, SQLite/로컬 Postgres 를 사용해
+TimeRangeView.handle_summary 또는 Summary.process_summary 를 실행하고
+처리량, 지연 시간 백분위수, LLM 호출 수, 최대 메모리를 측정합니다.
+
+    python -m bench.run                                # 기본 시나리오 전체
+    python -m bench.run -s 24h -s concurrent --users 16
+    python -m bench.run --compare latest               # 직전 결과와 비교 (회귀 시 종료 코드 1)
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from bench.fakes import ChannelSpec, FakeAuthor, FakeInteraction, FakeTextChannel, generate_messages
+from bench.gemini_stub import GeminiStub
+from bot import transcript
+from bot.cogs.summary import Summary, SummaryLevel
+from bot.loopmonitor import LoopLagMonitor
+from bot.models import Base
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# 표준 시나리오: 요약 구간(시간), 동시 사용자 수, 반복 횟수
+SCENARIOS = {
+    "1h": {"hours": 1, "users": 1, "repeat": 5},
+    "24h": {"hours": 24, "users": 1, "repeat": 3},
+    "7d": {"hours": 24 * 7, "users": 1, "repeat": 1},
+    "concurrent": {"hours": 24, "users": 8, "repeat": 1},
+}
+
+# 비교 시 회귀로 판단할 지표 (값이 클수록 나쁨)
+COMPARED_FIELDS = ("p50_ms", "p95_ms", "p99_ms", "llm_calls", "peak_rss_mb", "loop_lag_max_ms")
+
+
+class _BenchBot:
+    """Cog 생성에 필요한 최소한의 봇 객체"""
+    user = None
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def peak_rss_mb() -> float:
+    # Linux 에서 ru_maxrss 는 KB 단위
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_scenario(name, config, args, cog, stub):
+    hours = config["hours"]
+    users = args.users if args.users and name == "concurrent" else config["users"]
+    repeat = args.repeat or config["repeat"]
+    end = datetime.now(timezone.utc)
+    start = end - timedelta(hours=hours)
+
+    channels = []
+    for index in range(users):
+        spec = ChannelSpec(
+            messages_per_hour=args.rate,
+            avg_length=args.avg_length,
+            authors=args.authors,
+            seed=args.seed + index,
+        )
+        messages = generate_messages(spec, start, end)
+        channels.append(FakeTextChannel(9000 + index, 8000, messages, page_latency=args.page_latency))
+    message_count = sum(len(channel.messages) for channel in channels)
+
+    stub.reset()
+    monitor = LoopLagMonitor(interval=0.05, threshold=0.05, report_interval=3600)
+    monitor.start(asyncio.get_running_loop())
+    if args.trace_memory:
+        tracemalloc.start()
+
+    latencies = []
+    failures = 0
+
+    async def one_request(channel, user_index):
+        nonlocal failures
+        user = FakeAuthor(5000 + user_index, f"bench-user{user_index}")
+        prefetch = None
+        if args.think_time and args.target == "handle":
+            # 사용자가 옵션을 고르는 시간 동안 히스토리 미리 가져오기 (지연 시간은 선택 이후부터 측정)
+            prefetch = cog.start_prefetch(channel)
+            await asyncio.sleep(args.think_time)
+        request_started = time.perf_counter()
+        if args.target == "process":
+            rows = [(m.created_at.timestamp(), m.author.display_name, m.content) for m in channel.messages if not m.author.bot]
+            conversation = transcript.format_messages(rows)
+            try:
+                await cog.process_summary(conversation, SummaryLevel.SIMPLE)
+            except Exception:
+                failures += 1
+        else:
+            interaction = FakeInteraction(channel, user)
+            view = Summary.TimeRangeView(SummaryLevel.SIMPLE, cog.logger, cog, prefetch=prefetch)
+            await view.handle_summary(interaction, SummaryLevel.SIMPLE, start, end)
+            if any(content and content.startswith("❌") for content, _ in interaction.followup.sent):
+                failures += 1
+        latencies.append(time.perf_counter() - request_started)
+
+    wall_started = time.perf_counter()
+    for _ in range(repeat):
+        await asyncio.gather(*(one_request(channel, index) for index, channel in enumerate(channels)))
+    wall = time.perf_counter() - wall_started
+
+    monitor.stop()
+    lag = monitor.snapshot()
+    traced_peak = None
+    if args.trace_memory:
+        traced_peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+
+    requests = users * repeat
+    return {
+        "hours": hours,
+        "users": users,
+        "repeat": repeat,
+        "messages_per_request": message_count // users,
+        "requests": requests,
+        "failures": failures,
+        "wall_s": wall,
+        "requests_per_s": requests / wall if wall else 0.0,
+        "messages_per_s": message_count * repeat / wall if wall else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "llm_calls": stub.calls,
+        "llm_calls_per_request": stub.calls / requests if requests else 0.0,
+        "llm_errors": stub.errors,
+        "llm_max_in_flight": stub.max_in_flight,
+        "history_pages": sum(channel.pages_fetched for channel in channels),
+        "peak_rss_mb": peak_rss_mb(),
+        "traced_peak_mb": traced_peak,
+        "loop_lag_max_ms": lag["lag_max_ms"],
+        "loop_lag_p99_ms": lag["lag_p99_ms"],
+    }
+
+
+def find_baseline(reference, current_path):
+    if reference != "latest":
+        return Path(reference)
+    candidates = sorted(path for path in RESULTS_DIR.glob("*.json") if path != current_path)
+    return candidates[-1] if candidates else None
+
+
+def compare(current, baseline, tolerance) -> bool:
+    regressed = False
+    print(f"\n기준 결과와 비교 (허용 오차 {tolerance * 100:.0f}%): {baseline.get('timestamp')} ({baseline.get('git_revision')})")
+    for name, result in current["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            print(f"  {name}: 기준 결과 없음")
+            continue
+        for field in COMPARED_FIELDS:
+            before, after = previous.get(field), result.get(field)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            marker = ""
+            if change > tolerance:
+                marker = "  <-- 회귀"
+                regressed = True
+            print(f"  {name:<12} {field:<16} {before:>12.1f} -> {after:>12.1f} ({change * 100:+.1f}%){marker}")
+    return regressed
+
+
+def print_result(name, result):
+    print(
+        f"{name:<12} 요청={result['requests']:<4} 메시지/요청={result['messages_per_request']:<7} "
+        f"p50={result['p50_ms']:.0f}ms p95={result['p95_ms']:.0f}ms p99={result['p99_ms']:.0f}ms "
+        f"처리량={result['requests_per_s']:.2f}req/s ({result['messages_per_s']:.0f}msg/s) "
+        f"LLM={result['llm_calls']} 실패={result['failures']} RSS={result['peak_rss_mb']:.0f}MB "
+        f"루프지연최대={result['loop_lag_max_ms']:.0f}ms"
+    )
+
+
+async def main(args) -> int:
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(asctime)s:%(levelname)s:%(name)s: %(message)s')
+
+    stub = GeminiStub(latency=args.llm_latency, jitter=args.llm_jitter, error_rate=args.llm_error_rate)
+    await stub.start()
+
+    engine = create_async_engine(args.database_url, echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async_session = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+    # 벤치마크 중에는 의미 검색 인덱스를 디스크에 저장하지 않음
+    os.environ.setdefault('SEMANTIC_INDEX_DIR', '')
+    cog = Summary(_BenchBot(), async_session)
+    cog.summarizer.gemini_api_url = stub.url
+    cog.summarizer.gemini_api_key = "bench"
+    # 기본값은 기존 시나리오(7d 등)가 허용 제어에 막히지 않도록 제한 없음
+    if args.max_calls:
+        cog.estimator.max_calls = args.max_calls
+    else:
+        cog.estimator.max_calls = cog.estimator.max_messages = math.inf
+
+    results = {}
+    try:
+        for name in args.scenario:
+            result = await run_scenario(name, SCENARIOS[name], args, cog, stub)
+            results[name] = result
+            print_result(name, result)
+    finally:
+        await cog.cog_unload()
+        await stub.stop()
+        await engine.dispose()
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_revision": git_revision(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("compare",)},
+        "environment": {key: value for key, value in os.environ.items() if key.startswith("TRANSCRIPT_")},
+        "scenarios": results,
+    }
+    RESULTS_DIR.mkdir(exist_ok=True)
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.json"
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+    print(f"\n결과 저장: {output}")
+
+    if args.compare:
+        baseline_path = find_baseline(args.compare, output)
+        if baseline_path is None or not baseline_path.exists():
+            print("비교할 기준 결과가 없습니다.")
+            return 0
+        baseline = json.loads(baseline_path.read_text())
+        if compare(report, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="discord-summary-bot 오프라인 벤치마크")
+    parser.add_argument("-s", "--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="실행할 시나리오 (여러 번 지정 가능, 기본값: 전체)")
+    parser.add_argument("--target", choices=("handle", "process"), default="handle",
+                        help="handle: TimeRangeView.handle_summary 전체, process: Summary.process_summary 만")
+    parser.add_argument("--users", type=int, help="concurrent 시나리오의 동시 사용자 수")
+    parser.add_argument("--repeat", type=int, help="시나리오 반복 횟수")
+    parser.add_argument("--rate", type=float, default=300, help="시간당 메시지 수")
+    parser.add_argument("--avg-length", type=int, default=60, help="평균 메시지 길이 (문자)")
+    parser.add_argument("--authors", type=int, default=20, help="작성자 수")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--page-latency", type=float, default=0.0, help="history 페이지(100개)당 지연 (초)")
+    parser.add_argument("--think-time", type=float, default=0.0,
+                        help="옵션 선택에 걸리는 시간 (초). 0 보다 크면 그동안 히스토리를 미리 가져옴")
+    parser.add_argument("--max-calls", type=int, default=0,
+                        help="요청당 Gemini 호출 상한 (허용 제어, 0 이면 제한 없음)")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Gemini 스텁 평균 응답 지연 (초)")
+    parser.add_argument("--llm-jitter", type=float, default=0.01, help="Gemini 스텁 응답 지연 표준편차 (초)")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="Gemini 스텁 오류 응답 비율")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL", "sqlite+aiosqlite:///:memory:"),
+                        help="요약 저장용 DB (기본값: 메모리 SQLite)")
+    parser.add_argument("--trace-memory", action="store_true", help="tracemalloc 으로 할당 최대치 측정 (느려짐)")
+    parser.add_argument("--output", help="결과 JSON 경로 (기본값: bench/results/<시각>.json)")
+    parser.add_argument("--compare", help="비교할 기준 결과 JSON 경로 또는 'latest'")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="회귀 판단 허용 오차 (비율)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="봇 INFO 로그 출력")
+    args = parser.parse_args(argv)
+    if not args.scenario:
+        args.scenario = list(SCENARIOS)
+    return args
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main(parse_args())))
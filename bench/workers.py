@@ -0,0 +1,138 @@
+# bench/workers.py
+"""
+로컬 멀티 워커 테스트.
+
+Gemini 스텁 서버와 공유 DB 를 준비하고 작업을 등록한 뒤 bot.worker 프로세스 N 개를 실행해
+모든 작업이 정확히 한 번씩 완료되는지, 워커별로 어떻게 분배되는지 확인합니다.
+--kill 을 지정하면 처리 도중 워커 하나를 강제 종료해 임대 만료 후 재할당되는지도 확인합니다.
+
+    python -m bench.workers --workers 4 --jobs 40
+    BENCH_DATABASE_URL=postgresql+asyncpg://localhost/summary_bench python -m bench.workers --kill
+"""
+
+import argparse
+import asyncio
+import collections
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from bench.gemini_stub import GeminiStub
+from bot import transcript
+from bot.jobs import JobQueue, DONE, FAILED
+from bot.models import Base, SummaryJob
+from bot.summarizer import MAX_CHUNK_SIZE
+
+
+async def main(args) -> int:
+    stub = GeminiStub(latency=args.llm_latency, jitter=args.llm_latency / 5, error_rate=args.llm_error_rate)
+    await stub.start()
+
+    database_url = args.database_url
+    if not database_url:
+        database_url = f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'jobs.db')}"
+    engine = create_async_engine(database_url, echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(delete(SummaryJob))
+    async_session = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    queue = JobQueue(async_session, lease_seconds=args.lease, max_attempts=3)
+
+    conversation = "\n".join(f"[00:00] user{i % 7}: 테스트 메시지 {i}" for i in range(args.lines))
+    job_ids = [await queue.enqueue(conversation, "간단", trace_id=f"bench{index:04d}") for index in range(args.jobs)]
+
+    env = dict(os.environ)
+    env.update(
+        DATABASE_URL=database_url,
+        DB_CREATE_ALL='false',
+        GEMINI_API_URL=stub.url,
+        GEMINI_API_KEY='bench',
+        GEMINI_MAX_RETRIES='2',
+        JOB_LEASE_SECONDS=str(args.lease),
+        WORKER_CONCURRENCY=str(args.concurrency),
+        WORKER_IDLE_INTERVAL='0.2',
+        TRANSCRIPT_POOL_MODE='off',
+    )
+    env.pop('METRICS_PORT', None)
+
+    started = time.perf_counter()
+    processes = []
+    for index in range(args.workers):
+        env['WORKER_ID'] = f"bench-worker{index}"
+        processes.append(await asyncio.create_subprocess_exec(
+            sys.executable, '-m', 'bot.worker', env=dict(env),
+            stdout=None if args.verbose else asyncio.subprocess.DEVNULL,
+            stderr=None if args.verbose else asyncio.subprocess.DEVNULL,
+        ))
+
+    killed = False
+    deadline = time.perf_counter() + args.timeout
+    while time.perf_counter() < deadline:
+        async with async_session() as session:
+            result = await session.execute(select(SummaryJob.status))
+            statuses = collections.Counter(row[0] for row in result)
+        if args.kill and not killed and statuses.get(DONE, 0) >= args.jobs // 4:
+            processes[0].kill()
+            killed = True
+            print("워커 0 강제 종료")
+        if statuses.get(DONE, 0) + statuses.get(FAILED, 0) >= args.jobs:
+            break
+        await asyncio.sleep(0.2)
+    elapsed = time.perf_counter() - started
+
+    for process in processes:
+        if process.returncode is None:
+            process.terminate()
+    await asyncio.gather(*(process.wait() for process in processes))
+
+    async with async_session() as session:
+        result = await session.execute(select(SummaryJob).where(SummaryJob.id.in_(job_ids)))
+        jobs = result.scalars().all()
+    await engine.dispose()
+    await stub.stop()
+
+    statuses = collections.Counter(job.status for job in jobs)
+    by_worker = collections.Counter(job.worker_id.split('/')[0] for job in jobs if job.status == DONE)
+    retried = sum(1 for job in jobs if job.attempts > 1)
+    # 맵 요약(청크 수) + 통합 요약 1회 (청크가 하나면 1회)
+    chunks = len(transcript.split_text_into_chunks(conversation, MAX_CHUNK_SIZE))
+    expected_calls = chunks + 1 if chunks > 1 else 1
+
+    print(f"작업 {args.jobs}개, 워커 {args.workers}개 x 동시 {args.concurrency}: {elapsed:.2f}초")
+    print(f"상태: {dict(statuses)}  재시도된 작업: {retried}")
+    print("워커별 완료: " + ", ".join(f"{worker}={count}" for worker, count in sorted(by_worker.items())))
+    print(f"LLM 호출: {stub.calls} (작업당 최소 {expected_calls}, 오류 응답 {stub.errors})")
+
+    ok = statuses.get(DONE, 0) == args.jobs
+    if not args.llm_error_rate and not killed and stub.calls != expected_calls * args.jobs:
+        # 오류/강제 종료가 없는데 호출 수가 다르면 같은 작업이 중복 처리된 것
+        print("중복 처리 감지")
+        ok = False
+    print("통과" if ok else "실패")
+    return 0 if ok else 1
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="요약 워커 다중 프로세스 테스트")
+    parser.add_argument("--workers", type=int, default=3, help="워커 프로세스 수")
+    parser.add_argument("--concurrency", type=int, default=2, help="워커당 동시 처리 작업 수")
+    parser.add_argument("--jobs", type=int, default=30, help="등록할 작업 수")
+    parser.add_argument("--lines", type=int, default=200, help="작업당 대화 줄 수")
+    parser.add_argument("--lease", type=float, default=5.0, help="작업 임대 시간 (초)")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Gemini 스텁 평균 응답 지연 (초)")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="Gemini 스텁 오류 응답 비율")
+    parser.add_argument("--kill", action="store_true", help="처리 도중 워커 하나를 강제 종료")
+    parser.add_argument("--timeout", type=float, default=120.0, help="전체 대기 시간 제한 (초)")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL"),
+                        help="공유 DB (기본값: 임시 SQLite 파일)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="워커 로그 출력")
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main(parse_args())))
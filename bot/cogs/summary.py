@@ -1,19 +1,30 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import aiohttp
 from datetime import datetime, timedelta, timezone
 import logging
-from sqlalchemy import select
+from sqlalchemy import select, func
 from sqlalchemy.exc import SQLAlchemyError
-from bot.models import Summary as SummaryModel
+from bot.models import Summary as SummaryModel, GuildRetention
+from bot import transcript
+from bot import metrics
+from bot import tracing
+from bot.logconfig import clip
+from bot.semantic_index import SemanticIndex
+from bot.summarizer import Summarizer, SummaryLevel
+from bot.jobs import JobQueue
+from bot.partitions import PartitionManager
+from bot.prefetch import HistoryPrefetch
+from bot import estimator
 import os
+import asyncio
+import functools
+import math
+import time
 from enum import Enum
 
-# 요약 수준을 정의하는 Enum
-class SummaryLevel(Enum):
-    SIMPLE = "간단"
-    DETAILED = "상세"
+# 스레드 닫기 버튼 custom_id 접두사 (뒤에 ":<요청자 ID>")
+CLOSE_THREAD_ID = "summary:close_thread"
 
 # 시간대 옵션을 정의하는 Enum
 class TimeRangeOption(Enum):
@@ -23,22 +34,175 @@ class TimeRangeOption(Enum):
     YESTERDAY = "어제"
     CUSTOM = "사용자 정의"
 
+# 미리 정의된 시간대의 (시작, 종료)
+def preset_time_range(selected_range: TimeRangeOption, now: datetime):
+    if selected_range == TimeRangeOption.LAST_HOUR:
+        return now - timedelta(hours=1), now
+    if selected_range == TimeRangeOption.LAST_24_HOURS:
+        return now - timedelta(hours=24), now
+    if selected_range == TimeRangeOption.TODAY:
+        return datetime(now.year, now.month, now.day, tzinfo=timezone.utc), now
+    if selected_range == TimeRangeOption.YESTERDAY:
+        today = datetime(now.year, now.month, now.day, tzinfo=timezone.utc)
+        return today - timedelta(days=1), today
+    # 기본값
+    return now - timedelta(hours=2), now
+
+# DB 에서 읽은 시각을 UTC 기준 aware datetime 으로 (SQLite 는 시간대 정보 없이 반환)
+def as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+# 허용 제어에서 거절된 요청 안내 메시지
+def rejection_message(plan, summary_estimator) -> str:
+    if plan.reason == "budget":
+        text = f"❌ 오늘 이 서버의 요약 한도(Gemini 호출 {summary_estimator.budget.daily_calls}회)를 초과하는 요청입니다."
+    else:
+        text = (
+            f"❌ 요청한 시간대가 너무 큽니다 (예상 메시지 약 {plan.estimate.messages:,}개, "
+            f"Gemini 호출 약 {plan.estimate.calls}회)."
+        )
+    if plan.suggested_start is not None:
+        text += (
+            f"\n사용자 정의 시간대로 {plan.suggested_start.strftime('%Y-%m-%d %H:%M')} ~ "
+            f"{plan.estimate.end_time.strftime('%Y-%m-%d %H:%M')} (UTC) 정도로 줄여 주세요."
+        )
+    elif plan.reason == "budget":
+        text += "\n내일(UTC) 다시 시도해 주세요."
+    return text
+
 class Summary(commands.Cog):
     def __init__(self, bot: commands.Bot, async_session):
         self.bot = bot
         self.async_session = async_session
         self.logger = logging.getLogger('discord_summary_bot.Summary')
-        self.gemini_api_key = os.getenv('GEMINI_API_KEY')
-        self.gemini_api_url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash-latest:generateContent"
+        # 대용량 대화 처리를 이벤트 루프 밖에서 실행하기 위한 풀
+        self.transcript_pool = transcript.TranscriptPool.from_env()
+        self.summarizer = Summarizer(self.transcript_pool)
+        # 요약을 별도 워커 프로세스에서 처리하는 경우 작업 큐 사용
+        self.job_queue = JobQueue(async_session) if os.getenv('SUMMARY_QUEUE_MODE', 'inline') == 'queue' else None
+        # 요약본 의미 검색 인덱스
+        self.semantic_index = SemanticIndex.from_env()
+        self.index_flush_interval = float(os.getenv('SEMANTIC_INDEX_FLUSH_INTERVAL', '60'))
+        self._index_task = None
+        # 월별 파티션 생성 및 보관 기간 만료 요약본 아카이브
+        self.partition_manager = PartitionManager.from_env(async_session)
+        self.partition_maintenance = os.getenv('PARTITION_MAINTENANCE', 'true').lower() in ('1', 'true', 'yes')
+        self.partition_interval = float(os.getenv('PARTITION_MAINTENANCE_INTERVAL', '3600'))
+        self._partition_task = None
+        self.history_prefetch = HistoryPrefetch.enabled_from_env()
+        # 요청 규모 추정, 요약 전략 결정 및 길드별 Gemini 호출 예산
+        self.estimator = estimator.SummaryEstimator.from_env()
         self.logger.info("Summary Cog initialized.")
 
+    async def cog_load(self):
+        self._index_task = asyncio.create_task(self.maintain_semantic_index())
+        if self.partition_maintenance:
+            self._partition_task = asyncio.create_task(self.maintain_partitions())
+
+    async def cog_unload(self):
+        self.transcript_pool.shutdown()
+        if self._index_task is not None:
+            self._index_task.cancel()
+        if self._partition_task is not None:
+            self._partition_task.cancel()
+        if self.semantic_index.dirty:
+            self.semantic_index.save()
+
+    # 저장된 인덱스를 불러오고 DB 에만 있는 요약을 색인한 뒤 주기적으로 디스크에 저장
+    async def maintain_semantic_index(self):
+        loop = asyncio.get_running_loop()
+        try:
+            db_init_task = getattr(self.bot, 'db_init_task', None)
+            if db_init_task is not None:
+                await asyncio.shield(db_init_task)
+            await loop.run_in_executor(None, self.semantic_index.load)
+            await self.catch_up_semantic_index()
+        except Exception as e:
+            self.logger.error("의미 검색 인덱스 초기화 오류: %s", e)
+
+        while True:
+            await asyncio.sleep(self.index_flush_interval)
+            # 다른 프로세스(샤드)가 저장한 요약도 색인
+            try:
+                await self.catch_up_semantic_index()
+            except Exception as e:
+                self.logger.error("의미 검색 인덱스 갱신 오류: %s", e)
+            if self.semantic_index.dirty:
+                try:
+                    await loop.run_in_executor(None, self.semantic_index.save)
+                except OSError as e:
+                    self.logger.error("의미 검색 인덱스 저장 오류: %s", e)
+
+    # 미래 파티션을 미리 만들고 보관 기간이 지난 요약본을 아카이브 (PostgreSQL 에서는 한 프로세스만 실행)
+    async def maintain_partitions(self):
+        db_init_task = getattr(self.bot, 'db_init_task', None)
+        if db_init_task is not None:
+            try:
+                await asyncio.shield(db_init_task)
+            except Exception:
+                pass
+        while True:
+            try:
+                archived = await self.partition_manager.run_maintenance()
+                if archived:
+                    self.semantic_index.discard(archived)
+                    self.logger.info("보관 기간이 지난 요약본 %s개를 아카이브했습니다.", len(archived))
+            except Exception as e:
+                self.logger.error("파티션 유지보수 오류: %s", e)
+            await asyncio.sleep(self.partition_interval)
+
+    # 의미 검색 인덱스에 기록된 생성 시각으로 created_at 범위 조건을 만들어 파티션 조회 범위를 좁힘
+    def created_at_bounds(self, summary_ids) -> list:
+        timestamps = self.semantic_index.created_at_of(summary_ids)
+        if not timestamps or len(timestamps) < len(set(summary_ids)):
+            return []
+        # epoch 변환 오차를 고려해 1초 여유
+        lower = datetime.fromtimestamp(min(timestamps.values()) - 1, tz=timezone.utc)
+        upper = datetime.fromtimestamp(max(timestamps.values()) + 1, tz=timezone.utc)
+        return [SummaryModel.created_at >= lower, SummaryModel.created_at <= upper]
+
+    async def catch_up_semantic_index(self, batch_size=1000):
+        loop = asyncio.get_running_loop()
+        last_id = self.semantic_index.synced_id
+        # 현재 최대 ID 까지만 처리하고, 이후 저장분은 다음 주기에 처리 (이 프로세스의 저장분은 save_summary 에서 이미 색인됨)
+        async with self.async_session() as session:
+            upper_id = (await session.execute(select(func.max(SummaryModel.id)))).scalar() or 0
+        added = 0
+        while last_id < upper_id:
+            async with self.async_session() as session:
+                stmt = select(
+                    SummaryModel.id, SummaryModel.guild_id, SummaryModel.channel_id,
+                    SummaryModel.user_id, SummaryModel.created_at, SummaryModel.summary
+                ).where(
+                    SummaryModel.id > last_id, SummaryModel.id <= upper_id
+                ).order_by(SummaryModel.id).limit(batch_size)
+                result = await session.execute(stmt)
+                rows = result.all()
+            if not rows:
+                break
+            batch = [
+                (row.id, row.guild_id, row.channel_id, row.user_id,
+                 as_utc(row.created_at).timestamp() if row.created_at else 0.0, row.summary or "")
+                for row in rows if row.guild_id
+            ]
+            # 벡터화는 이벤트 루프 밖에서 실행
+            await loop.run_in_executor(None, self.semantic_index.add_many, batch)
+            added += len(batch)
+            last_id = rows[-1].id
+        if upper_id > self.semantic_index.synced_id:
+            self.semantic_index.synced_id = upper_id
+            self.semantic_index.dirty = True
+        if added:
+            self.logger.info("의미 검색 인덱스에 %s개의 요약을 추가했습니다.", added)
+
     # 요약 수준 선택을 위한 View 클래스
     class SummaryLevelView(discord.ui.View):
-        def __init__(self, logger, cog):
+        def __init__(self, logger, cog, prefetch=None):
             super().__init__(timeout=60)  # 1분 후 타임아웃
             self.logger = logger
             self.cog = cog
             self.message = None
+            self.prefetch = prefetch
 
         @discord.ui.select(
             placeholder="요약 수준을 선택하세요.",
@@ -51,13 +215,16 @@ class Summary(commands.Cog):
         )
         async def select_callback(self, interaction: discord.Interaction, select: discord.ui.Select):
             selected_level = SummaryLevel(select.values[0])
-            self.logger.info(f"요약 수준 선택: {selected_level.value}")
+            self.logger.info("요약 수준 선택: %s", selected_level.value)
 
-            # 다음 단계: 시간대 선택
-            time_view = Summary.TimeRangeView(selected_level, self.logger, self.cog)
+            # 다음 단계: 시간대 선택 (미리 가져오기는 다음 View 로 넘기고, 이 View 의 타임아웃은 중지)
+            self.stop()
+            time_view = Summary.TimeRangeView(selected_level, self.logger, self.cog, prefetch=self.prefetch)
             await interaction.response.edit_message(content="🕒 요약할 시간대를 선택하세요.", view=time_view)
 
         async def on_timeout(self):
+            if self.prefetch is not None:
+                self.prefetch.cancel()
             for child in self.children:
                 child.disabled = True
             if self.message:
@@ -65,11 +232,15 @@ class Summary(commands.Cog):
 
     # 시간대 선택을 위한 View 클래스
     class TimeRangeView(discord.ui.View):
-        def __init__(self, summary_level, logger, cog):
+        def __init__(self, summary_level, logger, cog, prefetch=None):
             super().__init__(timeout=60)  # 1분 후 타임아웃
             self.summary_level = summary_level
             self.logger = logger
             self.cog = cog
+            # /요약 실행 시 시작한 히스토리 미리 가져오기 (없으면 요약 시 전체 조회)
+            self.prefetch = prefetch
+            # 열려 있는 사용자 정의 시간대 모달 수
+            self.pending_modals = 0
 
         @discord.ui.select(
             placeholder="시간대를 선택하세요.",
@@ -85,96 +256,193 @@ class Summary(commands.Cog):
         )
         async def select_callback(self, interaction: discord.Interaction, select: discord.ui.Select):
             selected_range = TimeRangeOption(select.values[0])
-            self.logger.info(f"시간대 선택: {selected_range.value}")
+            self.logger.info("시간대 선택: %s", selected_range.value)
 
             if selected_range == TimeRangeOption.CUSTOM:
                 # 사용자 정의 시간대 입력을 위한 모달 호출
-                modal = Summary.CustomTimeRangeModal(self.summary_level, self.logger, self.handle_summary, self.cog)
+                # (모달을 닫으면 다시 고를 수 있도록 View 는 제출될 때까지 유지)
+                self.pending_modals += 1
+                modal = Summary.CustomTimeRangeModal(self.summary_level, self.logger, self.handle_summary, self.cog, view=self)
                 await interaction.response.send_modal(modal)
             else:
                 # 미리 정의된 시간대 처리
+                self.stop()
                 start_time, end_time = self.get_time_range(selected_range)
                 await self.handle_summary(interaction, self.summary_level, start_time, end_time)
 
+        async def on_timeout(self):
+            # 시간대를 고르지 않은 경우 (입력 중인 모달이 있으면 모달이 닫힐 때 정리)
+            if not self.pending_modals:
+                self.release_prefetch()
+
+        def modal_closed(self, submitted):
+            self.pending_modals -= 1
+            if submitted:
+                self.stop()
+            elif self.is_finished() and not self.pending_modals:
+                # View 가 이미 타임아웃된 뒤 마지막 모달까지 닫힌 경우
+                self.release_prefetch()
+
+        def release_prefetch(self):
+            if self.prefetch is not None:
+                self.prefetch.cancel()
+                self.prefetch = None
+
         def get_time_range(self, selected_range: TimeRangeOption):
-            now = datetime.now(timezone.utc)
-            if selected_range == TimeRangeOption.LAST_HOUR:
-                start_time = now - timedelta(hours=1)
-                end_time = now
-            elif selected_range == TimeRangeOption.LAST_24_HOURS:
-                start_time = now - timedelta(hours=24)
-                end_time = now
-            elif selected_range == TimeRangeOption.TODAY:
-                start_time = datetime(now.year, now.month, now.day, tzinfo=timezone.utc)
-                end_time = now
-            elif selected_range == TimeRangeOption.YESTERDAY:
-                start_time = datetime(now.year, now.month, now.day, tzinfo=timezone.utc) - timedelta(days=1)
-                end_time = datetime(now.year, now.month, now.day, tzinfo=timezone.utc)
-            else:
-                # 기본값
-                start_time = now - timedelta(hours=2)
-                end_time = now
-            self.logger.debug(f"파싱된 시간대 - 시작: {start_time}, 종료: {end_time}")
+            start_time, end_time = preset_time_range(selected_range, datetime.now(timezone.utc))
+            self.logger.debug("파싱된 시간대 - 시작: %s, 종료: %s", start_time, end_time)
             return start_time, end_time
 
         async def handle_summary(self, interaction: discord.Interaction, summary_level: SummaryLevel, start_time, end_time):
             """
             요약 생성 및 전송을 처리하는 메소드
             """
-            self.logger.info(f"요약 생성 시작: 수준={summary_level.value}, 시간대=시작={start_time}, 종료={end_time}")
-
-            # 메시지 수집
+            tracing.new_trace_id()
+            try:
+                with metrics.SUMMARY_STAGE_SECONDS.time(stage="total"):
+                    outcome = await self._run_summary(interaction, summary_level, start_time, end_time)
+            finally:
+                self.release_prefetch()
+            metrics.SUMMARY_REQUESTS.inc(outcome=outcome)
+
+        # 요약 구간의 메시지 수집 (미리 가져온 히스토리가 있으면 이어서 조회)
+        async def collect_messages(self, channel, start_time, end_time) -> list:
+            if self.prefetch is not None:
+                prefetch, self.prefetch = self.prefetch, None
+                return await prefetch.collect(start_time, end_time)
             messages = []
+            async for message in channel.history(limit=None, after=start_time, before=end_time):
+                if not message.author.bot:
+                    # 포맷팅은 수집 후 한 번에 처리 (대용량이면 풀에서 실행)
+                    messages.append((message.created_at.timestamp(), message.author.display_name, message.content))
+            return messages
+
+        async def _run_summary(self, interaction: discord.Interaction, summary_level: SummaryLevel, start_time, end_time) -> str:
+            self.logger.info("요약 생성 시작: 수준=%s, 시간대=시작=%s, 종료=%s", summary_level.value, start_time, end_time)
+
             channel = interaction.channel
+            if not isinstance(channel, (discord.TextChannel, discord.DMChannel)):
+                await interaction.followup.send("❌ 이 채널에서는 요약 기능을 사용할 수 없습니다.", ephemeral=True)
+                return "unsupported_channel"
+            guild_id = interaction.guild.id if interaction.guild else None
+
+            # 요청 규모 추정 및 허용 제어 (히스토리 수집과 Gemini 호출 전에 결정)
             try:
+                with metrics.SUMMARY_STAGE_SECONDS.time(stage="estimate"):
+                    plan = await self.cog.plan_summary(
+                        channel, guild_id, start_time, end_time, prefetch=self.prefetch,
+                        user_id=interaction.user.id, summary_level=summary_level
+                    )
+            except discord.Forbidden:
+                self.logger.warning("메시지 읽기 권한이 없습니다.")
+                await interaction.followup.send("❌ 메시지 읽기 권한이 없습니다.", ephemeral=True)
+                return "forbidden"
+            except discord.HTTPException as e:
+                self.logger.error("요청 규모 추정 중 HTTP 오류: %s", e)
+                await interaction.followup.send("❌ 메시지 수집 중 오류가 발생했습니다.", ephemeral=True)
+                return "history_error"
+            if plan.strategy == estimator.REJECT:
+                await interaction.followup.send(rejection_message(plan, self.cog.estimator), ephemeral=True)
+                return "rejected"
+            if plan.seconds >= self.cog.estimator.notice_seconds:
+                await interaction.followup.send(
+                    f"⏳ 메시지 약 {plan.messages:,}개를 요약합니다. "
+                    f"예상 소요 시간은 약 {math.ceil(plan.seconds)}초입니다.",
+                    ephemeral=True
+                )
+            # 롤업이면 저장된 요약이 없는 구간만 수집
+            segments = plan.gaps if plan.strategy == estimator.ROLLUP else [(start_time, end_time)]
+
+            # 메시지 수집
+            collected = []
+            history_started = time.perf_counter()
+            try:
+                for segment_start, segment_end in segments:
+                    collected.append(await self.collect_messages(channel, segment_start, segment_end))
                 if isinstance(channel, discord.TextChannel):
-                    async for message in channel.history(limit=None, after=start_time, before=end_time):
-                        if not message.author.bot:
-                            timestamp = message.created_at.strftime('%Y-%m-%d %H:%M:%S')
-                            messages.append(f"{timestamp} | {message.author.display_name}: {message.content}")
-                    self.logger.info(f"수집된 메시지 수: {len(messages)}")
-                elif isinstance(channel, discord.DMChannel):
-                    async for message in channel.history(limit=None, after=start_time, before=end_time):
-                        if not message.author.bot:
-                            timestamp = message.created_at.strftime('%Y-%m-%d %H:%M:%S')
-                            messages.append(f"{timestamp} | {message.author.display_name}: {message.content}")
-                    self.logger.info(f"DM 수집된 메시지 수: {len(messages)}")
+                    self.logger.info("수집된 메시지 수: %s", sum(len(rows) for rows in collected))
                 else:
-                    await interaction.followup.send("❌ 이 채널에서는 요약 기능을 사용할 수 없습니다.", ephemeral=True)
-                    return
+                    self.logger.info("DM 수집된 메시지 수: %s", sum(len(rows) for rows in collected))
             except discord.Forbidden:
                 self.logger.warning("메시지 읽기 권한이 없습니다.")
+                self.cog.estimator.budget.release(guild_id, plan.calls)
                 await interaction.followup.send("❌ 메시지 읽기 권한이 없습니다.", ephemeral=True)
-                return
+                return "forbidden"
             except discord.HTTPException as e:
-                self.logger.error(f"메시지 수집 중 HTTP 오류: {e}")
+                self.logger.error("메시지 수집 중 HTTP 오류: %s", e)
+                self.cog.estimator.budget.release(guild_id, plan.calls)
                 await interaction.followup.send("❌ 메시지 수집 중 오류가 발생했습니다.", ephemeral=True)
-                return
-
-            if not messages:
+                return "history_error"
+            finally:
+                history_seconds = time.perf_counter() - history_started
+                metrics.SUMMARY_STAGE_SECONDS.observe(history_seconds, stage="history")
+            messages = [row for rows in collected for row in rows]
+            metrics.SUMMARY_MESSAGES.observe(len(messages))
+            if plan.strategy != estimator.ROLLUP:
+                self.cog.estimator.observe_history(channel.id, start_time, end_time, messages, history_seconds)
+
+            if not messages and not plan.saved:
                 self.logger.info("해당 시간대에 메시지가 없습니다.")
+                self.cog.estimator.budget.release(guild_id, plan.calls)
                 await interaction.followup.send("⚠️ 해당 시간대에 메시지가 없습니다.", ephemeral=True)
-                return
+                return "no_messages"
 
             # 메시지 텍스트로 합치기
-            conversation = "\n".join(messages)
-            self.logger.debug(f"대화 내용: {conversation}")
+            with metrics.SUMMARY_STAGE_SECONDS.time(stage="format"):
+                conversations = [await self.cog.transcript_pool.format_messages(rows) if rows else "" for rows in collected]
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("대화 내용: %s", clip("\n".join(conversations)))
+
+            # 실제 대화 크기로 예약한 호출 수 조정
+            calls = sum(estimator.call_count(estimator.chunk_count(len(text))) for text in conversations)
+            if plan.strategy == estimator.ROLLUP:
+                calls += 1
+            budget = self.cog.estimator.budget
+            # 추가로 필요한 호출이 오늘 남은 예산을 넘는지 (예약한 plan.calls 는 이미 사용량에 포함됨)
+            over_budget = calls - plan.calls > budget.remaining(guild_id)
+            if calls > plan.calls and (calls > self.cog.estimator.max_calls or over_budget):
+                # 추정보다 훨씬 큰 경우 Gemini 를 호출하기 전에 중단 (관측값은 이미 반영되어 다음 추정에 사용됨)
+                self.logger.warning(
+                    "추정보다 큰 요청을 중단합니다: 예상 호출 %s회, 실제 %s회, 남은 예산 %s회",
+                    plan.calls, calls, budget.remaining(guild_id)
+                )
+                budget.release(guild_id, plan.calls)
+                if over_budget:
+                    text = (
+                        f"❌ 예상보다 메시지가 많아 오늘 이 서버의 요약 한도(Gemini 호출 {budget.daily_calls}회)를 "
+                        f"초과합니다 (메시지 {len(messages):,}개, Gemini 호출 약 {calls}회). "
+                        "더 짧은 시간대를 선택하거나 내일(UTC) 다시 시도해 주세요."
+                    )
+                else:
+                    text = (
+                        f"❌ 예상보다 메시지가 많아 요약할 수 없습니다 (메시지 {len(messages):,}개, Gemini 호출 약 {calls}회). "
+                        "더 짧은 시간대를 선택해 주세요."
+                    )
+                await interaction.followup.send(text, ephemeral=True)
+                return "rejected"
+            budget.settle(guild_id, plan.calls, calls)
 
             # 요약 생성 로직
+            summary_started = time.perf_counter()
             try:
-                summary = await self.cog.process_summary(conversation, summary_level)
+                if plan.strategy == estimator.ROLLUP:
+                    summary = await self.cog.process_rollup(plan, conversations, summary_level)
+                else:
+                    summary = await self.cog.process_summary(conversations[0], summary_level)
                 self.logger.info("요약 생성 완료.")
                 if not summary:
                     self.logger.warning("요약 내용이 비어있습니다.")
                     await interaction.followup.send("⚠️ 요약 내용이 비어있습니다.", ephemeral=True)
-                    return
+                    return "empty_summary"
             except Exception as e:
-                self.logger.error(f"요약 생성 중 오류: {e}")
+                self.logger.error("요약 생성 중 오류: %s", e)
                 await interaction.followup.send(f"❌ 요약 생성 중 오류가 발생했습니다: {e}", ephemeral=True)
-                return
+                return "summary_error"
+            self.cog.estimator.observe_calls(calls, time.perf_counter() - summary_started)
 
             # 임베드 생성 및 페이지 나누기
-            summary_pages = self.cog.split_text_into_pages(summary, max_length=2048)
+            with metrics.SUMMARY_STAGE_SECONDS.time(stage="paginate"):
+                summary_pages = await self.cog.transcript_pool.split_text_into_pages(summary, max_length=2048)
             pages = []
             for page_content in summary_pages:
                 embed = discord.Embed(
@@ -187,58 +455,69 @@ class Summary(commands.Cog):
                 pages.append(embed)
 
             if len(pages) > 1:
-                view = Summary.PaginationView(pages)
-                message = await interaction.followup.send(embed=pages[0], view=view, ephemeral=True)
-                view.message = message
+                with metrics.SUMMARY_STAGE_SECONDS.time(stage="deliver"):
+                    view = Summary.PaginationView(pages)
+                    message = await interaction.followup.send(embed=pages[0], view=view, ephemeral=True)
+                    view.message = message
             else:
                 if isinstance(channel, discord.TextChannel):
                     try:
-                        thread = await interaction.channel.create_thread(
-                            name=f"요약-{interaction.user.display_name}-{datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')}",
-                            type=discord.ChannelType.private_thread,
-                            invitable=False,
-                            reason="Summary thread for user"
-                        )
-                        await thread.add_user(interaction.user)
-                        close_view = Summary.CloseThreadView(thread, interaction.user.id, self.logger)
-                        await thread.send(embed=pages[0], view=close_view)
-                        self.logger.info(f"비공개 쓰레드 '{thread.name}'에 요약을 전송했습니다.")
-
-                        thread_url = thread.jump_url
-                        await interaction.followup.send(f"✅ 비공개 스레드가 생성되었습니다: {thread_url}", ephemeral=True)
+                        with metrics.SUMMARY_STAGE_SECONDS.time(stage="thread"):
+                            thread = await interaction.channel.create_thread(
+                                name=f"요약-{interaction.user.display_name}-{datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')}",
+                                type=discord.ChannelType.private_thread,
+                                invitable=False,
+                                reason="Summary thread for user"
+                            )
+                            await thread.add_user(interaction.user)
+                        with metrics.SUMMARY_STAGE_SECONDS.time(stage="deliver"):
+                            close_view = Summary.CloseThreadView(interaction.user.id)
+                            await thread.send(embed=pages[0], view=close_view)
+                            close_view.stop()
+                            self.logger.info("비공개 쓰레드 '%s'에 요약을 전송했습니다.", thread.name)
+
+                            thread_url = thread.jump_url
+                            await interaction.followup.send(f"✅ 비공개 스레드가 생성되었습니다: {thread_url}", ephemeral=True)
 
                     except discord.Forbidden:
                         self.logger.error("비공개 쓰레드 생성 권한이 없습니다.")
                         await interaction.followup.send("❌ 비공개 쓰레드를 생성할 권한이 없습니다.", ephemeral=True)
-                        return
+                        return "thread_forbidden"
                     except discord.HTTPException as e:
-                        self.logger.error(f"비공개 쓰레드 생성 또는 메시지 전송 중 HTTP 오류: {e}")
+                        self.logger.error("비공개 쓰레드 생성 또는 메시지 전송 중 HTTP 오류: %s", e)
                         await interaction.followup.send("❌ 비공개 쓰레드 생성 또는 메시지 전송 중 오류가 발생했습니다.", ephemeral=True)
-                        return
+                        return "deliver_error"
                 else:
                     try:
-                        embed = pages[0]
-                        await interaction.followup.send(embed=embed, ephemeral=True)
+                        with metrics.SUMMARY_STAGE_SECONDS.time(stage="deliver"):
+                            embed = pages[0]
+                            await interaction.followup.send(embed=embed, ephemeral=True)
                         self.logger.info("요약 임베드를 직접 전송했습니다.")
                     except discord.HTTPException as e:
-                        self.logger.error(f"임베드 전송 중 HTTP 오류: {e}")
+                        self.logger.error("임베드 전송 중 HTTP 오류: %s", e)
                         await interaction.followup.send("❌ 요약 임베드를 전송하는 중 오류가 발생했습니다.", ephemeral=True)
-                        return
+                        return "deliver_error"
 
             # 데이터베이스에 요약 저장 (텍스트 채널인 경우만 저장)
             if isinstance(channel, discord.TextChannel):
-                await self.cog.save_summary(interaction.guild.id, interaction.channel.id, interaction.user.id, start_time, end_time, summary)
+                await self.cog.save_summary(
+                    interaction.guild.id, interaction.channel.id, interaction.user.id, start_time, end_time, summary,
+                    summary_level=summary_level, source="rollup" if plan.strategy == estimator.ROLLUP else "messages"
+                )
             else:
                 self.logger.info("비텍스트 채널에서 요약을 저장하지 않았습니다.")
+            return "ok"
 
     # 사용자 정의 시간대 입력을 위한 모달 클래스
     class CustomTimeRangeModal(discord.ui.Modal):
-        def __init__(self, summary_level, logger, callback, cog):
-            super().__init__(title="사용자 정의 시간대 입력")
+        def __init__(self, summary_level, logger, callback, cog, view=None):
+            super().__init__(title="사용자 정의 시간대 입력", timeout=600)  # 10분 안에 입력하지 않으면 정리
             self.summary_level = summary_level
             self.logger = logger
             self.callback = callback
             self.cog = cog
+            # 모달을 연 TimeRangeView (제출/타임아웃 시 알림)
+            self.parent_view = view
 
             self.start = discord.ui.TextInput(
                 label="시작 날짜 및 시간 (YYYY-MM-DD HH:MM)",
@@ -256,45 +535,65 @@ class Summary(commands.Cog):
         async def on_submit(self, interaction: discord.Interaction):
             start_str = self.start.value
             end_str = self.end.value
-            self.logger.info(f"사용자 정의 시간대 입력: 시작={start_str}, 종료={end_str}")
+            self.logger.info("사용자 정의 시간대 입력: 시작=%s, 종료=%s", start_str, end_str)
             try:
                 start_time = datetime.strptime(start_str, "%Y-%m-%d %H:%M").replace(tzinfo=timezone.utc)
                 end_time = datetime.strptime(end_str, "%Y-%m-%d %H:%M").replace(tzinfo=timezone.utc)
                 if end_time <= start_time:
                     raise ValueError("종료 시간은 시작 시간보다 늦어야 합니다.")
-                self.logger.debug(f"파싱된 사용자 정의 시간대: 시작={start_time}, 종료={end_time}")
+                self.logger.debug("파싱된 사용자 정의 시간대: 시작=%s, 종료=%s", start_time, end_time)
             except ValueError as e:
-                self.logger.error(f"사용자 정의 시간대 파싱 오류: {e}")
+                self.logger.error("사용자 정의 시간대 파싱 오류: %s", e)
                 if not interaction.response.is_done():
                     await interaction.response.send_message(f"❌ 시간대 입력 오류: {e}", ephemeral=True)
                 else:
                     await interaction.followup.send(f"❌ 시간대 입력 오류: {e}", ephemeral=True)
+                # 시간대 선택 메뉴에서 다시 입력할 수 있음
+                self.closed(submitted=False)
                 return
 
+            self.closed(submitted=True)
             await self.callback(interaction, self.summary_level, start_time, end_time)
 
+        async def on_timeout(self):
+            self.closed(submitted=False)
+
+        def closed(self, submitted):
+            if self.parent_view is not None:
+                self.parent_view.modal_closed(submitted)
+
     @app_commands.command(name="요약", description="대화를 요약합니다.")
     async def summarize(self, interaction: discord.Interaction):
-        self.logger.info(f"/요약 명령어 실행: 사용자={interaction.user}")
+        self.logger.info("/요약 명령어 실행: 사용자=%s", interaction.user)
         await interaction.response.defer(ephemeral=True)
-        view = self.SummaryLevelView(self.logger, self)
+        view = self.SummaryLevelView(self.logger, self, prefetch=self.start_prefetch(interaction.channel))
         message = await interaction.followup.send("📜 요약 수준을 선택하세요.", view=view, ephemeral=True)
         view.message = message
 
+    # 옵션을 고르는 동안 미리 정의된 시간대 중 가장 긴 구간의 히스토리를 미리 가져옴
+    def start_prefetch(self, channel):
+        if not self.history_prefetch or not isinstance(channel, (discord.TextChannel, discord.DMChannel)):
+            return None
+        now = datetime.now(timezone.utc)
+        window_start = min(
+            preset_time_range(option, now)[0] for option in TimeRangeOption if option != TimeRangeOption.CUSTOM
+        )
+        return HistoryPrefetch.from_env(channel, window_start).start()
+
     # 회의록 검색 명령어
     @app_commands.command(name="회의록검색", description="특정 날짜의 요약본을 검색합니다.")
     @app_commands.describe(date="검색할 날짜 (예: 2023-10-01)")
     async def search_summaries(self, interaction: discord.Interaction, date: str):
-        self.logger.info(f"/회의록검색 명령어 실행: 사용자={interaction.user}, 날짜={date}")
+        self.logger.info("/회의록검색 명령어 실행: 사용자=%s, 날짜=%s", interaction.user, date)
         await interaction.response.defer(ephemeral=True)
 
         # 날짜 형식 검증
         try:
             search_date = datetime.strptime(date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
             next_day = search_date + timedelta(days=1)
-            self.logger.info(f"검색 날짜: {search_date}, 다음 날: {next_day}")
+            self.logger.info("검색 날짜: %s, 다음 날: %s", search_date, next_day)
         except ValueError:
-            self.logger.error(f"날짜 형식 오류: {date}")
+            self.logger.error("날짜 형식 오류: %s", date)
             await interaction.followup.send("❌ 날짜 형식이 올바르지 않습니다. YYYY-MM-DD 형식으로 입력해주세요.", ephemeral=True)
             return
 
@@ -308,9 +607,9 @@ class Summary(commands.Cog):
                 )
                 result = await session.execute(stmt)
                 summaries = result.scalars().all()
-            self.logger.info(f"검색된 요약본 수: {len(summaries)}")
+            self.logger.info("검색된 요약본 수: %s", len(summaries))
         except SQLAlchemyError as e:
-            self.logger.error(f"데이터베이스 조회 중 오류: {e}")
+            self.logger.error("데이터베이스 조회 중 오류: %s", e)
             await interaction.followup.send("❌ 데이터베이스 조회 중 오류가 발생했습니다.", ephemeral=True)
             return
 
@@ -336,16 +635,75 @@ class Summary(commands.Cog):
         await interaction.followup.send(embed=embed, ephemeral=True)
         self.logger.info("검색 결과를 전송했습니다.")
 
+    # 의미 검색 명령어
+    @app_commands.command(name="회의록찾기", description="내용으로 요약본을 검색합니다.")
+    @app_commands.describe(query="찾을 내용 (예: 릴리즈 날짜를 정한 회의)", scope="검색 범위 (기본값: 서버 전체)")
+    @app_commands.choices(scope=[
+        app_commands.Choice(name="서버 전체", value="guild"),
+        app_commands.Choice(name="현재 채널", value="channel"),
+    ])
+    async def semantic_search(self, interaction: discord.Interaction, query: str, scope: app_commands.Choice[str] = None):
+        self.logger.info("/회의록찾기 명령어 실행: 사용자=%s, 검색어=%s", interaction.user, query)
+        await interaction.response.defer(ephemeral=True)
+
+        if interaction.guild is None:
+            await interaction.followup.send("❌ 회의록 찾기는 서버 채널에서만 사용할 수 있습니다.", ephemeral=True)
+            return
+
+        channel_id = interaction.channel.id if scope and scope.value == "channel" else None
+        matches = self.semantic_index.search(query, interaction.guild.id, user_id=interaction.user.id, channel_id=channel_id, k=5)
+        self.logger.info("의미 검색 결과 수: %s", len(matches))
+        if not matches:
+            await interaction.followup.send("⚠️ 검색어와 관련된 요약본을 찾지 못했습니다.", ephemeral=True)
+            return
+
+        # 데이터베이스에서 요약본 조회
+        try:
+            async with self.async_session() as session:
+                match_ids = [summary_id for summary_id, _ in matches]
+                stmt = select(SummaryModel).where(
+                    SummaryModel.id.in_(match_ids),
+                    SummaryModel.user_id == str(interaction.user.id),
+                    *self.created_at_bounds(match_ids)
+                )
+                result = await session.execute(stmt)
+                summaries = {summary.id: summary for summary in result.scalars().all()}
+        except SQLAlchemyError as e:
+            self.logger.error("데이터베이스 조회 중 오류: %s", e)
+            await interaction.followup.send("❌ 데이터베이스 조회 중 오류가 발생했습니다.", ephemeral=True)
+            return
+
+        embed = discord.Embed(
+            title=f"🔎 '{query[:100]}' 검색 결과",
+            color=discord.Color.purple(),
+            timestamp=datetime.now(timezone.utc)
+        )
+        for summary_id, score in matches:
+            summary = summaries.get(summary_id)
+            if summary is None:
+                continue
+            snippet = (summary.summary or "").replace("\n", " ")
+            if len(snippet) > 150:
+                snippet = snippet[:150] + "…"
+            embed.add_field(
+                name=f"요약 ID: {summary.id} (유사도 {score:.2f})",
+                value=f"채널: <#{summary.channel_id}>\n생성 시간: {summary.created_at.strftime('%Y-%m-%d %H:%M:%S')}\n{snippet}",
+                inline=False
+            )
+
+        await interaction.followup.send(embed=embed, ephemeral=True)
+        self.logger.info("의미 검색 결과를 전송했습니다.")
+
     # 재요약 명령어
     @app_commands.command(name="요약다시", description="특정 요약본을 다시 요약합니다.")
     @app_commands.describe(summary_id="재요약할 요약 ID")
     async def resummarize(self, interaction: discord.Interaction, summary_id: str):
-        self.logger.info(f"/요약다시 명령어 실행: 사용자={interaction.user}, 요약 ID={summary_id}")
+        self.logger.info("/요약다시 명령어 실행: 사용자=%s, 요약 ID=%s", interaction.user, summary_id)
         await interaction.response.defer(ephemeral=True)
 
         # 요약 ID 검증
         if not summary_id.isdigit():
-            self.logger.error(f"유효하지 않은 요약 ID: {summary_id}")
+            self.logger.error("유효하지 않은 요약 ID: %s", summary_id)
             await interaction.followup.send("❌ 유효한 요약 ID가 아닙니다. 요약 ID는 숫자여야 합니다.", ephemeral=True)
             return
 
@@ -354,18 +712,19 @@ class Summary(commands.Cog):
             async with self.async_session() as session:
                 stmt = select(SummaryModel).where(
                     SummaryModel.id == int(summary_id),
-                    SummaryModel.user_id == str(interaction.user.id)
+                    SummaryModel.user_id == str(interaction.user.id),
+                    *self.created_at_bounds([int(summary_id)])
                 )
                 result = await session.execute(stmt)
                 summary_doc = result.scalar_one_or_none()
-            self.logger.info(f"검색된 요약본: {summary_doc}")
+            self.logger.info("검색된 요약본: %s", summary_doc)
         except SQLAlchemyError as e:
-            self.logger.error(f"데이터베이스 조회 중 오류: {e}")
+            self.logger.error("데이터베이스 조회 중 오류: %s", e)
             await interaction.followup.send("❌ 데이터베이스 조회 중 오류가 발생했습니다.", ephemeral=True)
             return
 
         if not summary_doc:
-            self.logger.warning(f"요약본을 찾을 수 없음 또는 접근 권한 없음: ID={summary_id}")
+            self.logger.warning("요약본을 찾을 수 없음 또는 접근 권한 없음: ID=%s", summary_id)
             await interaction.followup.send("❌ 해당 요약본을 찾을 수 없거나 접근 권한이 없습니다.", ephemeral=True)
             return
 
@@ -379,7 +738,7 @@ class Summary(commands.Cog):
                 await interaction.followup.send("⚠️ 재요약 내용이 비어있습니다.", ephemeral=True)
                 return
         except Exception as e:
-            self.logger.error(f"재요약 생성 중 오류: {e}")
+            self.logger.error("재요약 생성 중 오류: %s", e)
             await interaction.followup.send(f"❌ 재요약 생성 중 오류가 발생했습니다: {e}", ephemeral=True)
             return
 
@@ -411,9 +770,10 @@ class Summary(commands.Cog):
                         reason="Resummarized thread for user"
                     )
                     await thread.add_user(interaction.user)
-                    close_view = Summary.CloseThreadView(thread, interaction.user.id, self.logger)
+                    close_view = Summary.CloseThreadView(interaction.user.id)
                     await thread.send(embed=pages[0], view=close_view)
-                    self.logger.info(f"비공개 쓰레드 '{thread.name}'에 재요약을 전송했습니다.")
+                    close_view.stop()
+                    self.logger.info("비공개 쓰레드 '%s'에 재요약을 전송했습니다.", thread.name)
 
                     thread_url = thread.jump_url
                     await interaction.followup.send(f"✅ 비공개 스레드가 생성되었습니다: {thread_url}", ephemeral=True)
@@ -423,7 +783,7 @@ class Summary(commands.Cog):
                     await interaction.followup.send("❌ 비공개 쓰레드를 생성할 권한이 없습니다.", ephemeral=True)
                     return
                 except discord.HTTPException as e:
-                    self.logger.error(f"비공개 쓰레드 생성 또는 메시지 전송 중 HTTP 오류: {e}")
+                    self.logger.error("비공개 쓰레드 생성 또는 메시지 전송 중 HTTP 오류: %s", e)
                     await interaction.followup.send("❌ 비공개 쓰레드 생성 또는 메시지 전송 중 오류가 발생했습니다.", ephemeral=True)
                     return
             else:
@@ -432,7 +792,7 @@ class Summary(commands.Cog):
                     await interaction.followup.send(embed=embed, ephemeral=True)
                     self.logger.info("재요약 임베드를 직접 전송했습니다.")
                 except discord.HTTPException as e:
-                    self.logger.error(f"임베드 전송 중 HTTP 오류: {e}")
+                    self.logger.error("임베드 전송 중 HTTP 오류: %s", e)
                     await interaction.followup.send("❌ 재요약 임베드를 전송하는 중 오류가 발생했습니다.", ephemeral=True)
                     return
 
@@ -444,15 +804,53 @@ class Summary(commands.Cog):
                 interaction.user.id,
                 summary_doc.start_time,
                 summary_doc.end_time,
-                new_summary
+                new_summary,
+                summary_level=SummaryLevel.SIMPLE,
+                source="resummary"
             )
         else:
             self.logger.info("비텍스트 채널에서 요약을 저장하지 않았습니다.")
 
+    # 서버별 요약본 보관 기간 설정 명령어 (서버 관리 권한 필요)
+    @app_commands.command(name="보관기간", description="이 서버의 요약본 보관 기간을 확인하거나 설정합니다.")
+    @app_commands.describe(days="보관할 일수 (0 은 영구 보관, 생략하면 현재 설정 확인)")
+    @app_commands.guild_only()
+    @app_commands.default_permissions(manage_guild=True)
+    async def retention(self, interaction: discord.Interaction, days: app_commands.Range[int, 0, 36500] = None):
+        self.logger.info("/보관기간 명령어 실행: 사용자=%s, 서버=%s, 일수=%s", interaction.user, interaction.guild_id, days)
+        await interaction.response.defer(ephemeral=True)
+        guild_id = str(interaction.guild_id)
+
+        try:
+            async with self.async_session() as session:
+                async with session.begin():
+                    setting = await session.get(GuildRetention, guild_id)
+                    if days is not None:
+                        if setting is None:
+                            setting = GuildRetention(guild_id=guild_id)
+                            session.add(setting)
+                        setting.retention_days = days
+                        setting.updated_at = datetime.now(timezone.utc)
+                    current = setting.retention_days if setting is not None else self.partition_manager.default_retention_days
+        except SQLAlchemyError as e:
+            self.logger.error("보관 기간 설정 중 데이터베이스 오류: %s", e)
+            await interaction.followup.send("❌ 데이터베이스 처리 중 오류가 발생했습니다.", ephemeral=True)
+            return
+
+        description = "영구 보관" if not current else f"{current}일"
+        if days is None:
+            await interaction.followup.send(f"📦 이 서버의 요약본 보관 기간: **{description}**", ephemeral=True)
+        else:
+            self.logger.info("보관 기간 변경: 서버=%s, 일수=%s", guild_id, days)
+            await interaction.followup.send(
+                f"✅ 요약본 보관 기간을 **{description}**으로 설정했습니다. 기간이 지난 요약본은 압축 파일로 보관된 뒤 검색에서 제외됩니다.",
+                ephemeral=True
+            )
+
     # 도움말 명령어
     @app_commands.command(name="도움", description="봇의 사용법을 안내합니다.")
     async def help_command(self, interaction: discord.Interaction):
-        self.logger.info(f"/도움 명령어 실행: 사용자={interaction.user}")
+        self.logger.info("/도움 명령어 실행: 사용자=%s", interaction.user)
         embed = discord.Embed(
             title="📖 요약봇 도움말",
             color=discord.Color.green(),
@@ -466,6 +864,7 @@ class Summary(commands.Cog):
                 "2. 요약할 시간대를 선택하세요.\n"
                 "   - `지난 1시간`, `지난 24시간`, `오늘`, `어제`, `사용자 정의`.\n"
                 "   - `사용자 정의`를 선택하면 시작 및 종료 날짜와 시간을 입력할 수 있습니다.\n"
+                "   - 메시지가 너무 많은 시간대는 요약하지 않고, 요약할 수 있는 시간대를 안내합니다.\n"
                 "3. 요약이 완료되면, 텍스트 채널에서는 비공개 스레드에, DM 등에서는 직접 요약을 받습니다."
             ),
             inline=False
@@ -478,6 +877,14 @@ class Summary(commands.Cog):
             ),
             inline=False
         )
+        embed.add_field(
+            name="/회의록찾기 [검색어] [범위]",
+            value=(
+                "내용으로 요약본을 검색합니다. 범위는 `서버 전체` 또는 `현재 채널`을 선택할 수 있습니다.\n"
+                "**예시**: `/회의록찾기 릴리즈 날짜를 정한 회의`"
+            ),
+            inline=False
+        )
         embed.add_field(
             name="/요약다시 [요약 ID]",
             value=(
@@ -486,6 +893,14 @@ class Summary(commands.Cog):
             ),
             inline=False
         )
+        embed.add_field(
+            name="/보관기간 [일수]",
+            value=(
+                "이 서버의 요약본 보관 기간을 확인하거나 설정합니다. (서버 관리 권한 필요, 0 은 영구 보관)\n"
+                "**예시**: `/보관기간 365`"
+            ),
+            inline=False
+        )
         embed.set_footer(text="요약봇을 이용해 주셔서 감사합니다!")
         await interaction.response.send_message(embed=embed, ephemeral=True)
         self.logger.info("도움말 임베드 전송 완료.")
@@ -494,12 +909,12 @@ class Summary(commands.Cog):
     async def summarize_error(self, interaction: discord.Interaction, error):
         if isinstance(error, app_commands.CommandOnCooldown):
             await interaction.followup.send(f"⚠️ 명령어 사용 제한에 도달했습니다. {round(error.retry_after, 2)}초 후에 다시 시도해주세요.", ephemeral=True)
-            self.logger.warning(f"명령어 사용 제한: {error}")
+            self.logger.warning("명령어 사용 제한: %s", error)
         elif isinstance(error, app_commands.MissingPermissions):
             await interaction.followup.send("❌ 이 명령어를 사용할 권한이 없습니다.", ephemeral=True)
-            self.logger.warning(f"권한 부족: {error}")
+            self.logger.warning("권한 부족: %s", error)
         else:
-            self.logger.error(f"요약 명령어 실행 중 오류: {error}")
+            self.logger.error("요약 명령어 실행 중 오류: %s", error)
             try:
                 if not interaction.response.is_done():
                     await interaction.followup.send("❌ 명령어 실행 중 오류가 발생했습니다.", ephemeral=True)
@@ -512,12 +927,12 @@ class Summary(commands.Cog):
     async def search_summaries_error(self, interaction: discord.Interaction, error):
         if isinstance(error, app_commands.CommandOnCooldown):
             await interaction.followup.send(f"⚠️ 명령어 사용 제한에 도달했습니다. {round(error.retry_after, 2)}초 후에 다시 시도해주세요.", ephemeral=True)
-            self.logger.warning(f"명령어 사용 제한: {error}")
+            self.logger.warning("명령어 사용 제한: %s", error)
         elif isinstance(error, app_commands.MissingPermissions):
             await interaction.followup.send("❌ 이 명령어를 사용할 권한이 없습니다.", ephemeral=True)
-            self.logger.warning(f"권한 부족: {error}")
+            self.logger.warning("권한 부족: %s", error)
         else:
-            self.logger.error(f"회의록검색 명령어 실행 중 오류: {error}")
+            self.logger.error("회의록검색 명령어 실행 중 오류: %s", error)
             try:
                 if not interaction.response.is_done():
                     await interaction.followup.send("❌ 명령어 실행 중 오류가 발생했습니다.", ephemeral=True)
@@ -526,16 +941,40 @@ class Summary(commands.Cog):
             except discord.errors.NotFound:
                 self.logger.error("웹훅을 찾을 수 없습니다. 에러 메시지를 전송할 수 없습니다.")
 
+    @semantic_search.error
+    async def semantic_search_error(self, interaction: discord.Interaction, error):
+        if isinstance(error, app_commands.CommandOnCooldown):
+            await interaction.followup.send(f"⚠️ 명령어 사용 제한에 도달했습니다. {round(error.retry_after, 2)}초 후에 다시 시도해주세요.", ephemeral=True)
+            self.logger.warning("명령어 사용 제한: %s", error)
+        else:
+            self.logger.error("회의록찾기 명령어 실행 중 오류: %s", error)
+            try:
+                await interaction.followup.send("❌ 명령어 실행 중 오류가 발생했습니다.", ephemeral=True)
+            except discord.errors.NotFound:
+                self.logger.error("웹훅을 찾을 수 없습니다. 에러 메시지를 전송할 수 없습니다.")
+
+    @retention.error
+    async def retention_error(self, interaction: discord.Interaction, error):
+        if isinstance(error, app_commands.MissingPermissions):
+            await interaction.followup.send("❌ 이 명령어를 사용할 권한이 없습니다.", ephemeral=True)
+            self.logger.warning("권한 부족: %s", error)
+        else:
+            self.logger.error("보관기간 명령어 실행 중 오류: %s", error)
+            try:
+                await interaction.followup.send("❌ 명령어 실행 중 오류가 발생했습니다.", ephemeral=True)
+            except discord.errors.NotFound:
+                self.logger.error("웹훅을 찾을 수 없습니다. 에러 메시지를 전송할 수 없습니다.")
+
     @resummarize.error
     async def resummarize_error(self, interaction: discord.Interaction, error):
         if isinstance(error, app_commands.CommandOnCooldown):
             await interaction.followup.send(f"⚠️ 명령어 사용 제한에 도달했습니다. {round(error.retry_after, 2)}초 후에 다시 시도해주세요.", ephemeral=True)
-            self.logger.warning(f"명령어 사용 제한: {error}")
+            self.logger.warning("명령어 사용 제한: %s", error)
         elif isinstance(error, app_commands.MissingPermissions):
             await interaction.followup.send("❌ 이 명령어를 사용할 권한이 없습니다.", ephemeral=True)
-            self.logger.warning(f"권한 부족: {error}")
+            self.logger.warning("권한 부족: %s", error)
         else:
-            self.logger.error(f"재요약 명령어 실행 중 오류: {error}")
+            self.logger.error("재요약 명령어 실행 중 오류: %s", error)
             try:
                 if not interaction.response.is_done():
                     await interaction.followup.send("❌ 명령어 실행 중 오류가 발생했습니다.", ephemeral=True)
@@ -546,7 +985,7 @@ class Summary(commands.Cog):
 
     @help_command.error
     async def help_command_error(self, interaction: discord.Interaction, error):
-        self.logger.error(f"/도움 명령어 실행 중 오류: {error}")
+        self.logger.error("/도움 명령어 실행 중 오류: %s", error)
         try:
             if not interaction.response.is_done():
                 await interaction.followup.send("❌ 도움말을 불러오는 중 오류가 발생했습니다.", ephemeral=True)
@@ -556,164 +995,145 @@ class Summary(commands.Cog):
             self.logger.error("웹훅을 찾을 수 없습니다. 에러 메시지를 전송할 수 없습니다.")
 
     # 요약 생성 과정을 처리하는 메소드 (재요약에도 사용)
+    # SUMMARY_QUEUE_MODE=queue 이면 작업 테이블에 등록하고 워커 프로세스의 결과를 기다림
     async def process_summary(self, conversation: str, summary_level: SummaryLevel) -> str:
-        self.logger.info("요약 처리 과정을 시작합니다.")
-        
-        # 설정된 최대 글자 수
-        MAX_CHUNK_SIZE = 2000
-
-        # 대화 내용 분할
-        chunks = self.split_text_into_chunks(conversation, MAX_CHUNK_SIZE)
-        self.logger.info(f"대화 내용을 {len(chunks)}개의 청크로 분할했습니다.")
-
-        # 각 청크를 요약
-        summarized_chunks = []
-        for idx, chunk in enumerate(chunks, 1):
-            self.logger.info(f"청크 {idx}/{len(chunks)} 요약 중...")
-            prompt = f"다음 대화를 {summary_level.value}하게 요약해 주세요. 불필요한 번역이나 해석은 제외하고, 핵심 내용만 포함해 주세요:\n\n{chunk}"
-            summarized_chunk = await self.generate_summary_gemini(prompt)
-            if summarized_chunk:
-                summarized_chunks.append(summarized_chunk)
-            else:
-                self.logger.warning(f"청크 {idx} 요약 결과가 비어있습니다.")
-
-        # 청크 요약 결합
-        combined_summary = "\n".join(summarized_chunks)
-        self.logger.debug(f"결합된 청크 요약: {combined_summary}")
-
-        # 최종 요약 생성
-        self.logger.info("최종 요약 생성을 위해 결합된 요약을 다시 요약 중...")
-        final_prompt = f"다음 요약들을 통합하여 전체 대화를 {summary_level.value}하게 요약해 주세요:\n\n{combined_summary}"
-        final_summary = await self.generate_summary_gemini(final_prompt)
-        self.logger.info("최종 요약 생성 완료.")
-        return final_summary
-
-    # 긴 텍스트를 청크로 분할하는 메소드
-    def split_text_into_chunks(self, text: str, max_length: int) -> list:
-        self.logger.debug("텍스트를 청크로 분할합니다.")
-        chunks = []
-        current_chunk = ""
-        for line in text.split('\n'):
-            if len(current_chunk) + len(line) + 1 > max_length:
-                if current_chunk:
-                    chunks.append(current_chunk)
-                current_chunk = line + "\n"
-            else:
-                current_chunk += line + "\n"
-        if current_chunk:
-            chunks.append(current_chunk)
-        self.logger.debug(f"텍스트 분할 완료: {len(chunks)}개의 청크")
-        return chunks
+        if self.job_queue is not None:
+            job_id = await self.job_queue.enqueue(
+                conversation, summary_level.value, trace_id=tracing.get_trace_id()
+            )
+            self.logger.info("요약 작업을 등록했습니다: 작업 ID=%s", job_id)
+            return await self.job_queue.wait_for_result(job_id)
+        return await self.summarizer.process_summary(conversation, summary_level)
+
+    # 요청 규모를 추정하고 요약 전략 결정 (롤업에는 이 채널에서 같은 사용자가 같은 수준으로 저장한 요약을 사용)
+    async def plan_summary(self, channel, guild_id, start_time, end_time, prefetch=None, user_id=None, summary_level=None):
+        load_saved = None
+        if isinstance(channel, discord.TextChannel) and user_id is not None and summary_level is not None:
+            load_saved = functools.partial(self.load_saved_summaries, channel.id, user_id, summary_level)
+        return await self.estimator.plan(channel, guild_id, start_time, end_time, prefetch=prefetch, load_saved=load_saved)
+
+    # 구간 안에 완전히 포함되는 저장된 요약 (start_time, end_time, summary) 목록
+    # 다른 사용자나 다른 요약 수준의 요약, 롤업/재요약으로 만든 요약(요약의 요약)은 재사용하지 않음
+    async def load_saved_summaries(self, channel_id, user_id, summary_level: SummaryLevel, start_time, end_time) -> list:
+        async with self.async_session() as session:
+            stmt = select(SummaryModel.start_time, SummaryModel.end_time, SummaryModel.summary).where(
+                SummaryModel.channel_id == str(channel_id),
+                SummaryModel.user_id == str(user_id),
+                SummaryModel.summary_level == summary_level.value,
+                SummaryModel.source == "messages",
+                SummaryModel.start_time >= start_time,
+                SummaryModel.end_time <= end_time,
+                # 요약은 구간 시작 이후에 생성되므로 이전 파티션은 조회하지 않음
+                SummaryModel.created_at >= start_time,
+            ).order_by(SummaryModel.start_time)
+            result = await session.execute(stmt)
+            rows = result.all()
+        return [(as_utc(row.start_time), as_utc(row.end_time), row.summary) for row in rows if row.summary]
+
+    # 저장된 요약과 새로 요약한 구간을 시간 순으로 모아 통합 요약
+    # (구간 요약은 process_summary 를 거치고, 마지막 통합 요약 1회는 이 프로세스에서 호출)
+    async def process_rollup(self, plan, conversations, summary_level: SummaryLevel) -> str:
+        parts = [(row_start, row_summary) for row_start, _, row_summary in plan.saved]
+        for (gap_start, _), conversation in zip(plan.gaps, conversations):
+            if conversation:
+                parts.append((gap_start, await self.process_summary(conversation, summary_level)))
+        parts.sort(key=lambda part: part[0])
+        self.logger.info("롤업 요약: 저장된 요약 %s개, 새 구간 요약 %s개", len(plan.saved), len(parts) - len(plan.saved))
+        return await self.summarizer.reduce_summaries([text for _, text in parts if text], summary_level)
 
     # 긴 텍스트를 페이지로 분할하는 메소드
     def split_text_into_pages(self, text: str, max_length: int = 2000) -> list:
-        pages = []
-        current_page = ""
-        for line in text.split('\n'):
-            if len(current_page) + len(line) + 1 > max_length:
-                if current_page:
-                    pages.append(current_page)
-                current_page = line + "\n"
-            else:
-                current_page += line + "\n"
-        if current_page.strip():
-            pages.append(current_page.strip())
-        return pages
-
-    # Google Gemini API를 사용하여 요약 생성
-    async def generate_summary_gemini(self, prompt: str) -> str:
-        self.logger.info("Google Gemini API 호출을 시작합니다.")
-        url_with_key = f"{self.gemini_api_url}?key={self.gemini_api_key}"
-        headers = {
-            "Content-Type": "application/json"
-        }
-        payload = {
-            "prompt": {
-                "text": prompt
-            },
-            "maxOutputTokens": 2048,
-            "temperature": 0.7
-        }
-
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.post(url_with_key, headers=headers, json=payload) as response:
-                    response_text = await response.text()
-                    self.logger.debug(f"Google Gemini API 응답: {response_text}")
-
-                    if response.status == 200:
-                        data = await response.json()
-                        summary = data['candidates'][0]['output']['content'].strip()
-                        self.logger.info("Google Gemini API 호출이 완료되었습니다.")
-                        self.logger.debug(f"추출된 요약 내용: {summary}")
-                        return summary
-                    else:
-                        self.logger.error(f"Google Gemini API 호출 오류: {response.status} - {response_text}")
-                        raise Exception(f"Google Gemini API 호출 오류: {response.status} - {response_text}")
-            except Exception as e:
-                self.logger.error(f"Google Gemini API 호출 중 예외 발생: {e}")
-                raise e
+        return transcript.split_text_into_pages(text, max_length)
 
     # 요약본을 데이터베이스에 저장하는 메소드
-    async def save_summary(self, guild_id, channel_id, user_id, start_time, end_time, summary):
+    async def save_summary(self, guild_id, channel_id, user_id, start_time, end_time, summary, summary_level=None, source=None):
         self.logger.info("데이터베이스에 요약 저장을 시도합니다.")
-        self.logger.debug(f"start_time: {start_time}, tzinfo: {start_time.tzinfo}")
-        self.logger.debug(f"end_time: {end_time}, tzinfo: {end_time.tzinfo}")
-        self.logger.debug(f"summary: {summary}")
+        self.logger.debug("start_time: %s, tzinfo: %s", start_time, start_time.tzinfo)
+        self.logger.debug("end_time: %s, tzinfo: %s", end_time, end_time.tzinfo)
+        self.logger.debug("summary: %s", clip(summary))
         created_at = datetime.now(timezone.utc)
-        self.logger.debug(f"created_at: {created_at}, tzinfo: {created_at.tzinfo}")
+        self.logger.debug("created_at: %s, tzinfo: %s", created_at, created_at.tzinfo)
         try:
-            async with self.async_session() as session:
-                async with session.begin():
-                    new_summary = SummaryModel(
-                        guild_id=str(guild_id),
-                        channel_id=str(channel_id),
-                        user_id=str(user_id),
-                        start_time=start_time,
-                        end_time=end_time,
-                        summary=summary,
-                        created_at=created_at
-                    )
-                    session.add(new_summary)
-                await session.commit()
-                await session.refresh(new_summary)
-            self.logger.info(f"Summary saved with ID: {new_summary.id}")
+            with metrics.SUMMARY_STAGE_SECONDS.time(stage="save"):
+                async with self.async_session() as session:
+                    async with session.begin():
+                        new_summary = SummaryModel(
+                            guild_id=str(guild_id),
+                            channel_id=str(channel_id),
+                            user_id=str(user_id),
+                            start_time=start_time,
+                            end_time=end_time,
+                            summary=summary,
+                            summary_level=summary_level.value if summary_level else None,
+                            source=source,
+                            created_at=created_at
+                        )
+                        session.add(new_summary)
+                    await session.commit()
+                    await session.refresh(new_summary)
+            self.logger.info("Summary saved with ID: %s", new_summary.id)
         except SQLAlchemyError as e:
-            self.logger.error(f"데이터베이스 저장 오류: {e}")
+            self.logger.error("데이터베이스 저장 오류: %s", e)
             raise e
 
-    # 스레드를 닫기 위한 View 클래스
-    class CloseThreadView(discord.ui.View):
-        def __init__(self, thread, user_id, logger):
-            super().__init__(timeout=None)
-            self.thread = thread
-            self.user_id = user_id
-            self.logger = logger
+        # 의미 검색 인덱스에 추가 (인덱스 오류가 저장 실패로 이어지지 않도록 분리)
+        try:
+            self.semantic_index.add(new_summary.id, guild_id, channel_id, user_id, created_at.timestamp(), summary)
+        except Exception as e:
+            self.logger.error("의미 검색 인덱스 추가 오류: %s", e)
 
-        @discord.ui.button(label="스레드 닫기", style=discord.ButtonStyle.danger, emoji="🔒")
-        async def close_thread(self, interaction: discord.Interaction, button: discord.ui.Button):
-            if interaction.user.id != self.user_id:
-                await interaction.response.send_message("❌ 이 스레드를 닫을 권한이 없습니다.", ephemeral=True)
-                return
-            try:
-                await self.thread.edit(archived=True, locked=True)
-                await interaction.response.send_message("✅ 스레드가 성공적으로 닫혔습니다.", ephemeral=True)
-                self.stop()
-                for child in self.children:
-                    if isinstance(child, discord.ui.Button):
-                        child.disabled = True
-                if interaction.message:
-                    await interaction.message.edit(view=self)
-                await self.thread.send(
-                    f"🔒 이 스레드는 닫혔습니다.\n원래 채널로 돌아가려면 여기 클릭: <#{self.thread.parent.id}>"
-                )
+    # 스레드 닫기 버튼 처리
+    # 버튼의 custom_id 에 요청자 ID 가 들어 있으므로 봇이 재시작된 뒤에도 같은 방식으로 처리됨
+    @commands.Cog.listener()
+    async def on_interaction(self, interaction: discord.Interaction):
+        if interaction.type != discord.InteractionType.component:
+            return
+        custom_id = (interaction.data or {}).get("custom_id", "")
+        if custom_id == CLOSE_THREAD_ID or custom_id.startswith(CLOSE_THREAD_ID + ":"):
+            await self.close_thread(interaction, custom_id)
+
+    async def close_thread(self, interaction: discord.Interaction, custom_id: str):
+        owner_id = custom_id[len(CLOSE_THREAD_ID) + 1:]
+        thread = interaction.channel
+        # 요청자 ID 가 없는 이전 버튼은 스레드 관리 권한이 있는 사용자만 닫을 수 있음
+        is_owner = owner_id.isdigit() and interaction.user.id == int(owner_id)
+        if not isinstance(thread, discord.Thread) or not (is_owner or interaction.permissions.manage_threads):
+            await interaction.response.send_message("❌ 이 스레드를 닫을 권한이 없습니다.", ephemeral=True)
+            return
+        try:
+            await thread.edit(archived=True, locked=True)
+            await interaction.response.send_message("✅ 스레드가 성공적으로 닫혔습니다.", ephemeral=True)
+            if interaction.message:
+                closed_view = Summary.CloseThreadView(owner_id, disabled=True)
+                await interaction.message.edit(view=closed_view)
+                closed_view.stop()
+            await thread.send(
+                f"🔒 이 스레드는 닫혔습니다.\n원래 채널로 돌아가려면 여기 클릭: <#{thread.parent.id}>"
+            )
 
-            except discord.Forbidden:
-                self.logger.error("스레드를 수정할 권한이 없습니다.")
-                await interaction.response.send_message("❌ 스레드를 수정할 권한이 없습니다.", ephemeral=True)
-            except discord.HTTPException as e:
-                self.logger.error(f"스레드 수정 중 HTTP 오류: {e}")
-                await interaction.response.send_message("❌ 스레드를 수정하는 중 오류가 발생했습니다.", ephemeral=True)
+        except discord.Forbidden:
+            self.logger.error("스레드를 수정할 권한이 없습니다.")
+            await self.reply_close_error(interaction, "❌ 스레드를 수정할 권한이 없습니다.")
+        except discord.HTTPException as e:
+            self.logger.error("스레드 수정 중 HTTP 오류: %s", e)
+            await self.reply_close_error(interaction, "❌ 스레드를 수정하는 중 오류가 발생했습니다.")
+
+    # 스레드를 닫은 뒤 메시지 수정/전송에서 실패하면 이미 응답했으므로 followup 으로 안내
+    async def reply_close_error(self, interaction: discord.Interaction, text: str):
+        if interaction.response.is_done():
+            await interaction.followup.send(text, ephemeral=True)
+        else:
+            await interaction.response.send_message(text, ephemeral=True)
+
+    # 스레드를 닫기 위한 버튼만 담는 View
+    # 클릭은 on_interaction 에서 처리하므로 메시지를 보낸 뒤 stop() 으로 View 저장소에서 제거함
+    class CloseThreadView(discord.ui.View):
+        def __init__(self, user_id, disabled=False):
+            super().__init__(timeout=None)
+            self.add_item(discord.ui.Button(
+                label="스레드 닫기", style=discord.ButtonStyle.danger, emoji="🔒",
+                custom_id=f"{CLOSE_THREAD_ID}:{user_id}", disabled=disabled
+            ))
 
     # 임베드 페이지네이션을 위한 View 클래스
     class PaginationView(discord.ui.View):
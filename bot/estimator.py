@@ -0,0 +1,349 @@
+# bot/estimator.py
+
+import logging
+import math
+import os
+from datetime import datetime, timedelta, timezone
+
+import discord
+
+from bot import metrics
+from bot.summarizer import MAX_CHUNK_SIZE
+
+logger = logging.getLogger('discord_summary_bot.estimator')
+
+# 요약 전략
+SINGLE_PASS = "single_pass"
+MAP_REDUCE = "map_reduce"
+ROLLUP = "rollup"
+REJECT = "reject"
+
+# 히스토리 한 페이지의 메시지 수 (discord API 상한)
+HISTORY_PAGE_SIZE = 100
+# 대화 줄의 메시지 본문 외 길이 ("YYYY-MM-DD HH:MM:SS | " + ": " + 줄바꿈)
+LINE_OVERHEAD = 25
+# 관측값이 없을 때 사용하는 기본값
+DEFAULT_LINE_CHARS = 70
+# 관측값 반영 비율 (지수 이동 평균)
+EWMA_ALPHA = 0.3
+# 청크는 줄 단위로 나누므로 MAX_CHUNK_SIZE 를 다 채우지 못함
+CHUNK_FILL = 0.95
+
+
+def chunk_count(chars: float) -> int:
+    return max(1, math.ceil(chars / (MAX_CHUNK_SIZE * CHUNK_FILL))) if chars > 0 else 0
+
+
+def call_count(chunks: int) -> int:
+    """청크 수 -> Gemini 호출 수 (청크가 하나면 통합 요약 없이 한 번)"""
+    if chunks <= 1:
+        return chunks
+    return chunks + 1
+
+
+def _ewma(previous, value):
+    return value if previous is None else previous + EWMA_ALPHA * (value - previous)
+
+
+class Estimate:
+    """요약 요청 규모 추정값"""
+
+    def __init__(self, start_time, end_time, messages, line_chars, source, pages=None):
+        self.start_time = start_time
+        self.end_time = end_time
+        self.messages = max(0, int(round(messages)))
+        self.line_chars = line_chars
+        self.source = source
+        self.chars = self.messages * line_chars
+        self.chunks = chunk_count(self.chars)
+        self.calls = call_count(self.chunks)
+        # 프롬프트 입력 토큰 (한국어 대화 기준 대략 2자당 1토큰)
+        self.tokens = int(self.chars / 2)
+        self.pages = math.ceil(self.messages / HISTORY_PAGE_SIZE) if pages is None else pages
+        self.seconds = 0.0
+
+    def __repr__(self):
+        return (
+            f"Estimate(messages={self.messages}, chars={self.chars}, tokens={self.tokens}, "
+            f"calls={self.calls}, pages={self.pages}, seconds={self.seconds:.1f}, source={self.source})"
+        )
+
+
+class Plan:
+    """요약 실행 계획 (전략과 근거가 된 추정값)"""
+
+    def __init__(self, strategy, estimate, calls=None, messages=None, seconds=None, reason=None, suggested_start=None,
+                 saved=None, gaps=None):
+        self.strategy = strategy
+        self.estimate = estimate
+        # 실제로 수집할 메시지 수, 예산에서 차감하는 Gemini 호출 수, 예상 소요 시간 (롤업이면 비는 구간 기준)
+        self.calls = estimate.calls if calls is None else calls
+        self.messages = estimate.messages if messages is None else int(messages)
+        self.seconds = estimate.seconds if seconds is None else seconds
+        self.reason = reason
+        self.suggested_start = suggested_start
+        # 롤업: 재사용할 저장된 요약 (start_time, end_time, summary) 와 새로 요약할 구간 목록
+        self.saved = saved or []
+        self.gaps = gaps or []
+
+
+class GuildBudget:
+    """
+    길드별 하루(UTC) Gemini 호출 예산.
+    길드의 상호작용은 항상 같은 샤드(프로세스)로 전달되므로 프로세스 메모리에 보관합니다.
+    """
+
+    def __init__(self, daily_calls=0):
+        self.daily_calls = daily_calls
+        # guild_id -> (날짜, 사용한 호출 수)
+        self._used = {}
+
+    def used(self, guild_id) -> int:
+        day, used = self._used.get(guild_id, (None, 0))
+        return used if day == datetime.now(timezone.utc).date() else 0
+
+    def remaining(self, guild_id) -> float:
+        if not self.daily_calls or guild_id is None:
+            return math.inf
+        return max(0, self.daily_calls - self.used(guild_id))
+
+    def reserve(self, guild_id, calls):
+        if not self.daily_calls or guild_id is None:
+            return
+        self._used[guild_id] = (datetime.now(timezone.utc).date(), self.used(guild_id) + calls)
+        metrics.GUILD_BUDGET_CALLS.inc(calls)
+
+    def try_reserve(self, guild_id, calls) -> bool:
+        # 확인과 예약 사이에 await 가 없으므로 같은 길드의 동시 요청이 함께 통과하지 않음
+        if calls > self.remaining(guild_id):
+            return False
+        self.reserve(guild_id, calls)
+        return True
+
+    def settle(self, guild_id, reserved, actual):
+        # 실제 대화 크기로 계산한 호출 수와 예약한 호출 수의 차이 반영
+        if actual > reserved:
+            self.reserve(guild_id, actual - reserved)
+        else:
+            self.release(guild_id, reserved - actual)
+
+    def release(self, guild_id, calls):
+        # 요약을 시작하지 못한 경우 (메시지 없음, 권한 오류 등) 예약한 호출 반환
+        if not self.daily_calls or guild_id is None or not calls:
+            return
+        self._used[guild_id] = (datetime.now(timezone.utc).date(), max(0, self.used(guild_id) - calls))
+
+
+class SummaryEstimator:
+    """
+    히스토리를 읽기 전에 요약 요청의 메시지 수, 토큰, Gemini 호출 수, 예상 소요 시간을 추정하고
+    전략(single-pass, map-reduce, 롤업, 거절)을 정합니다.
+
+    - 스노우플레이크(채널 생성 시각)와 범위 안 첫 메시지 시각으로 실제 범위를 좁힙니다.
+    - 메시지 수는 미리 가져온 히스토리, 이전 요청에서 관측한 채널별 메시지 빈도,
+      둘 다 없으면 히스토리 한 페이지 조회(probe) 순으로 추정합니다.
+    """
+
+    def __init__(self, max_calls=400, max_messages=50000, daily_calls=0, page_seconds=0.3, call_seconds=3.0,
+                 notice_seconds=20.0, rollup_max_summaries=50):
+        self.max_calls = max_calls
+        self.max_messages = max_messages
+        self.budget = GuildBudget(daily_calls)
+        self.page_seconds = page_seconds
+        self.call_seconds = call_seconds
+        self.notice_seconds = notice_seconds
+        self.rollup_max_summaries = rollup_max_summaries
+        # channel_id -> [초당 메시지 수, 줄당 글자 수]
+        self._channels = {}
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_calls=int(os.getenv('SUMMARY_MAX_CALLS', '400')),
+            max_messages=int(os.getenv('SUMMARY_MAX_MESSAGES', '50000')),
+            daily_calls=int(os.getenv('GUILD_DAILY_CALL_BUDGET', '0')),
+            notice_seconds=float(os.getenv('SUMMARY_NOTICE_SECONDS', '20')),
+            rollup_max_summaries=int(os.getenv('ROLLUP_MAX_SUMMARIES', '50')),
+        )
+
+    # 실제 수집 결과로 채널별 메시지 빈도와 줄 길이 갱신
+    def observe_history(self, channel_id, start_time, end_time, rows, seconds=None):
+        span = (end_time - start_time).total_seconds()
+        if span <= 0:
+            return
+        stats = self._channels.setdefault(channel_id, [None, None])
+        stats[0] = _ewma(stats[0], len(rows) / span)
+        if rows:
+            stats[1] = _ewma(stats[1], sum(len(author) + len(content) for _, author, content in rows) / len(rows) + LINE_OVERHEAD)
+        if seconds is not None and len(rows) >= HISTORY_PAGE_SIZE:
+            self.page_seconds = _ewma(self.page_seconds, seconds / math.ceil(len(rows) / HISTORY_PAGE_SIZE))
+
+    def observe_calls(self, calls, seconds):
+        if calls > 0:
+            self.call_seconds = _ewma(self.call_seconds, seconds / calls)
+
+    def _line_chars(self, channel_id) -> float:
+        stats = self._channels.get(channel_id)
+        return stats[1] if stats and stats[1] else DEFAULT_LINE_CHARS
+
+    @staticmethod
+    def bounds(channel, start_time, end_time):
+        """스노우플레이크로 알 수 있는 실제 메시지 범위 (없으면 None)"""
+        lower = max(start_time, discord.utils.snowflake_time(channel.id))
+        # channel.last_message_id 는 메시지 이벤트(guild_messages 인텐트)로만 갱신되어 오래된 값일 수 있으므로
+        # 상한을 좁히는 데 쓰지 않음
+        upper = end_time
+        if upper <= lower:
+            return None
+        return lower, upper
+
+    @staticmethod
+    async def first_message_time(channel, lower, upper):
+        """범위 안의 가장 오래된 메시지 시각 (history 요청 1회, 없으면 None)"""
+        async for message in channel.history(limit=1, after=lower, before=upper, oldest_first=True):
+            return message.created_at
+        return None
+
+    async def estimate(self, channel, start_time, end_time, prefetch=None) -> Estimate:
+        bounds = self.bounds(channel, start_time, end_time)
+        if bounds is None:
+            return self._finish(Estimate(start_time, end_time, 0, DEFAULT_LINE_CHARS, "snowflake"))
+        lower, upper = bounds
+        if prefetch is None or not prefetch.complete or lower < prefetch.window_start:
+            # 미리 가져온 구간 밖이면 첫 메시지 시각으로 시작 시각을 좁힘 (채널 생성 직후부터의 빈 구간 제외)
+            first = await self.first_message_time(channel, lower, upper)
+            if first is None:
+                return self._finish(Estimate(lower, upper, 0, DEFAULT_LINE_CHARS, "snowflake", pages=1))
+            lower = max(lower, first - timedelta(milliseconds=1))
+        span = (upper - lower).total_seconds()
+        line_chars = self._line_chars(channel.id)
+
+        # 1) 미리 가져온 히스토리: 가져온 구간은 정확한 개수, 나머지는 그 빈도로 추정
+        if prefetch is not None and prefetch.rows:
+            covered_from = prefetch.window_start if prefetch.complete else prefetch.oldest.created_at
+            covered_span = (prefetch.anchor - covered_from).total_seconds()
+            if covered_span > 0:
+                lower_ts, upper_ts = lower.timestamp(), upper.timestamp()
+                known = sum(1 for row in prefetch.rows if lower_ts < row[0] < upper_ts)
+                rate = len(prefetch.rows) / covered_span
+                # 미리 가져오기 이전 구간과 시작 이후 새로 올라온 구간은 같은 빈도로 추정
+                uncovered = max(0.0, (min(upper, covered_from) - lower).total_seconds())
+                uncovered += max(0.0, (upper - max(lower, prefetch.anchor)).total_seconds())
+                line_chars = (prefetch.chars + sum(len(row[1]) for row in prefetch.rows)) / len(prefetch.rows) + LINE_OVERHEAD
+                return self._finish(Estimate(lower, upper, known + rate * uncovered, line_chars, "prefetch"))
+
+        # 2) 이전 요청에서 관측한 빈도
+        stats = self._channels.get(channel.id)
+        if stats and stats[0] is not None:
+            return self._finish(Estimate(lower, upper, stats[0] * span, line_chars, "stats"))
+
+        # 3) 히스토리 한 페이지 조회: 페이지를 다 채우지 못하면 범위 안의 메시지를 모두 읽은 것
+        rows = []
+        fetched = 0
+        newest = oldest = None
+        async for message in channel.history(limit=HISTORY_PAGE_SIZE, after=lower, before=upper, oldest_first=False):
+            fetched += 1
+            newest = newest or message.created_at
+            oldest = message.created_at
+            if not message.author.bot:
+                rows.append((message.created_at.timestamp(), message.author.display_name, message.content))
+        if rows:
+            line_chars = sum(len(author) + len(content) for _, author, content in rows) / len(rows) + LINE_OVERHEAD
+        if fetched < HISTORY_PAGE_SIZE:
+            return self._finish(Estimate(lower, upper, len(rows), line_chars, "probe", pages=1))
+        # 최근 한 페이지의 빈도로 전체 범위 추정
+        sampled = max((upper - oldest).total_seconds(), 1.0)
+        rate = len(rows) / sampled
+        self._channels[channel.id] = [rate, line_chars]
+        return self._finish(Estimate(
+            lower, upper, rate * span, line_chars, "probe", pages=math.ceil(fetched / sampled * span / HISTORY_PAGE_SIZE)
+        ))
+
+    def _finish(self, estimate: Estimate) -> Estimate:
+        estimate.seconds = estimate.pages * self.page_seconds + estimate.calls * self.call_seconds
+        return estimate
+
+    def _affordable_messages(self, calls, line_chars) -> int:
+        """Gemini 호출 calls 회 이내로 요약할 수 있는 메시지 수"""
+        if calls < 1:
+            return 0
+        chunks = 1 if calls < 3 else calls - 1
+        return min(self.max_messages, int(chunks * MAX_CHUNK_SIZE * CHUNK_FILL / line_chars))
+
+    async def plan(self, channel, guild_id, start_time, end_time, prefetch=None, load_saved=None) -> Plan:
+        """
+        요청 규모를 추정하고 전략을 정합니다. 거절이 아니면 길드 예산에서 호출 수를 예약합니다.
+        (예산 확인은 추정 전에 한 번, 예약 직전에 try_reserve() 로 다시 해서 동시 요청이 함께 초과하지 않도록 함)
+        load_saved(start, end): 범위 안에 저장된 요약 (start_time, end_time, summary) 목록 (롤업용)
+        """
+        estimate = await self.estimate(channel, start_time, end_time, prefetch)
+        remaining = self.budget.remaining(guild_id)
+        limit = min(self.max_calls, remaining)
+        plan = None
+
+        if estimate.calls <= limit and estimate.messages <= self.max_messages:
+            plan = Plan(SINGLE_PASS if estimate.calls <= 1 else MAP_REDUCE, estimate)
+        elif load_saved is not None and limit >= 1:
+            plan = await self._plan_rollup(start_time, end_time, estimate, limit, load_saved)
+
+        if plan is not None and not self.budget.try_reserve(guild_id, plan.calls):
+            # 추정과 롤업 조회를 기다리는 동안 같은 길드의 다른 요청이 예산을 사용한 경우
+            logger.info("동시 요청으로 남은 예산이 부족해 거절합니다: 필요 %s회, 남은 예산 %s회", plan.calls, self.budget.remaining(guild_id))
+            plan = None
+            limit = min(self.max_calls, self.budget.remaining(guild_id))
+        if plan is None:
+            plan = self._reject(estimate, limit)
+        metrics.SUMMARY_ADMISSION.inc(strategy=plan.strategy)
+        logger.info("요약 요청 추정: %s -> %s", estimate, plan.strategy)
+        return plan
+
+    async def _plan_rollup(self, start_time, end_time, estimate, limit, load_saved):
+        # 범위 안의 저장된 요약 중 겹치지 않는 것을 골라 재사용하고, 비는 구간만 새로 요약
+        saved = []
+        cursor = start_time
+        # 시작 시각이 같으면 더 긴 구간을 덮는 요약 우선
+        for row in sorted(await load_saved(start_time, end_time), key=lambda r: (r[0], r[0] - r[1])):
+            if row[0] >= cursor and len(saved) < self.rollup_max_summaries:
+                saved.append(row)
+                cursor = row[1]
+        if not saved:
+            return None
+
+        gaps = []
+        cursor = start_time
+        for row_start, row_end, _ in saved:
+            if row_start > cursor:
+                gaps.append((cursor, row_start))
+            cursor = row_end
+        if cursor < end_time:
+            gaps.append((cursor, end_time))
+
+        span = (estimate.end_time - estimate.start_time).total_seconds()
+        rate = estimate.messages / span if span > 0 else 0
+        calls = 1
+        messages = 0
+        for gap_start, gap_end in gaps:
+            gap_messages = rate * (gap_end - gap_start).total_seconds()
+            messages += gap_messages
+            calls += call_count(chunk_count(gap_messages * estimate.line_chars))
+        if calls > limit or messages > self.max_messages:
+            return None
+        logger.info("저장된 요약 %s개를 재사용합니다 (새로 요약할 구간 %s개, 예상 호출 %s회)", len(saved), len(gaps), calls)
+        seconds = math.ceil(messages / HISTORY_PAGE_SIZE) * self.page_seconds + calls * self.call_seconds
+        return Plan(ROLLUP, estimate, calls=calls, messages=messages, seconds=seconds, saved=saved, gaps=gaps)
+
+    def _reject(self, estimate, limit) -> Plan:
+        if limit < 1:
+            return Plan(REJECT, estimate, calls=0, reason="budget")
+        # 가장 최근 구간부터 감당할 수 있는 만큼으로 좁힌 범위 제안
+        affordable = self._affordable_messages(limit, estimate.line_chars)
+        span = (estimate.end_time - estimate.start_time).total_seconds()
+        suggested_start = None
+        if affordable > 0 and estimate.messages > 0:
+            seconds = span * affordable / estimate.messages
+            # 사용자 정의 입력이 분 단위이므로 다음 분으로 올림
+            suggested_start = (estimate.end_time - timedelta(seconds=seconds)).replace(second=0, microsecond=0) + timedelta(minutes=1)
+            if suggested_start >= estimate.end_time:
+                suggested_start = None
+        too_large = estimate.calls > self.max_calls or estimate.messages > self.max_messages
+        return Plan(REJECT, estimate, calls=0, reason="size" if too_large else "budget", suggested_start=suggested_start)
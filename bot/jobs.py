@@ -0,0 +1,214 @@
+# bot/jobs.py
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update, delete, or_, and_
+
+from bot.models import SummaryJob
+
+logger = logging.getLogger('discord_summary_bot.jobs')
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class JobFailed(Exception):
+    pass
+
+
+class JobQueue:
+    """
+    summary_jobs 테이블 기반 작업 큐.
+
+    워커는 SELECT ... FOR UPDATE SKIP LOCKED 로 대기 중이거나 임대(lease)가 만료된 작업을 하나씩 가져가고,
+    처리 중에는 하트비트로 임대를 연장합니다. 실패한 작업은 max_attempts 까지 지수 백오프로 재시도됩니다.
+    임대가 만료된 작업도 시도 횟수가 max_attempts 에 도달하면 다시 가져가지 않고 실패로 처리합니다.
+    (SKIP LOCKED 를 지원하지 않는 SQLite 에서도 조건부 UPDATE 로 중복 할당을 막습니다.)
+    """
+
+    def __init__(self, async_session, lease_seconds=None, poll_interval=None, timeout=None, max_attempts=None):
+        self.async_session = async_session
+        self.lease_seconds = lease_seconds or float(os.getenv('JOB_LEASE_SECONDS', '60'))
+        self.poll_interval = poll_interval or float(os.getenv('JOB_POLL_INTERVAL', '0.5'))
+        self.timeout = timeout or float(os.getenv('SUMMARY_JOB_TIMEOUT', '600'))
+        self.max_attempts = max_attempts or int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+        # 완료/실패한 작업 행을 보관하는 시간 (이후 purge_finished 에서 삭제)
+        self.retention_seconds = float(os.getenv('JOB_RETENTION_SECONDS', '86400'))
+
+    @staticmethod
+    def _claimable(now):
+        return or_(
+            and_(SummaryJob.status == PENDING, SummaryJob.available_at <= now),
+            and_(
+                SummaryJob.status == RUNNING,
+                SummaryJob.lease_expires_at < now,
+                SummaryJob.attempts < SummaryJob.max_attempts,
+            ),
+        )
+
+    async def enqueue(self, conversation, summary_level, guild_id=None, channel_id=None, user_id=None, trace_id=None) -> int:
+        now = datetime.now(timezone.utc)
+        async with self.async_session() as session:
+            async with session.begin():
+                job = SummaryJob(
+                    status=PENDING,
+                    guild_id=str(guild_id) if guild_id is not None else None,
+                    channel_id=str(channel_id) if channel_id is not None else None,
+                    user_id=str(user_id) if user_id is not None else None,
+                    summary_level=summary_level,
+                    conversation=conversation,
+                    trace_id=trace_id,
+                    attempts=0,
+                    max_attempts=self.max_attempts,
+                    available_at=now,
+                    created_at=now,
+                    updated_at=now,
+                )
+                session.add(job)
+            await session.refresh(job)
+        return job.id
+
+    async def wait_for_result(self, job_id: int) -> str:
+        """작업이 끝날 때까지 폴링하고 결과를 반환합니다. 실패하거나 시간이 초과되면 예외를 발생시킵니다."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        while True:
+            async with self.async_session() as session:
+                result = await session.execute(
+                    select(SummaryJob.status, SummaryJob.result, SummaryJob.error).where(SummaryJob.id == job_id)
+                )
+                row = result.one_or_none()
+            if row is None:
+                raise JobFailed(f"요약 작업을 찾을 수 없습니다: {job_id}")
+            if row.status == DONE:
+                return row.result
+            if row.status == FAILED:
+                raise JobFailed(f"요약 작업 실패: {row.error}")
+            if loop.time() >= deadline:
+                # 결과를 기다리는 쪽이 없으므로 대기 중이거나 처리 중인 작업을 취소
+                await self.cancel(job_id, "시간 초과로 취소됨")
+                raise JobFailed(f"요약 작업 시간 초과: {job_id}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def cancel(self, job_id: int, reason: str) -> bool:
+        """작업을 실패로 표시합니다. 처리 중인 워커는 다음 하트비트에서 임대를 잃고 처리를 중단합니다."""
+        now = datetime.now(timezone.utc)
+        async with self.async_session() as session:
+            async with session.begin():
+                result = await session.execute(
+                    update(SummaryJob)
+                    .where(SummaryJob.id == job_id, SummaryJob.status.in_((PENDING, RUNNING)))
+                    .values(status=FAILED, error=reason, conversation=None, lease_expires_at=None, updated_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+        return result.rowcount == 1
+
+    async def reap_expired(self) -> int:
+        """임대가 만료됐지만 더 재시도할 수 없는 작업(워커가 매번 비정상 종료되는 작업 등)을 실패로 처리합니다."""
+        now = datetime.now(timezone.utc)
+        async with self.async_session() as session:
+            async with session.begin():
+                result = await session.execute(
+                    update(SummaryJob)
+                    .where(
+                        SummaryJob.status == RUNNING,
+                        SummaryJob.lease_expires_at < now,
+                        SummaryJob.attempts >= SummaryJob.max_attempts,
+                    )
+                    .values(
+                        status=FAILED, error="임대 만료: 최대 시도 횟수 초과 (워커 비정상 종료)",
+                        conversation=None, lease_expires_at=None, updated_at=now,
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+        return result.rowcount
+
+    async def purge_finished(self) -> int:
+        """보관 시간이 지난 완료/실패 작업 행을 삭제합니다."""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.retention_seconds)
+        async with self.async_session() as session:
+            async with session.begin():
+                result = await session.execute(
+                    delete(SummaryJob)
+                    .where(SummaryJob.status.in_((DONE, FAILED)), SummaryJob.updated_at < cutoff)
+                    .execution_options(synchronize_session=False)
+                )
+        return result.rowcount
+
+    async def claim(self, worker_id: str):
+        """처리할 작업 하나를 임대합니다. 없으면 None."""
+        now = datetime.now(timezone.utc)
+        async with self.async_session() as session:
+            async with session.begin():
+                candidate = await session.execute(
+                    select(SummaryJob.id)
+                    .where(self._claimable(now))
+                    .order_by(SummaryJob.id)
+                    .limit(1)
+                    .with_for_update(skip_locked=True)
+                )
+                job_id = candidate.scalar_one_or_none()
+                if job_id is None:
+                    return None
+                claimed = await session.execute(
+                    update(SummaryJob)
+                    .where(SummaryJob.id == job_id, self._claimable(now))
+                    .values(
+                        status=RUNNING,
+                        worker_id=worker_id,
+                        attempts=SummaryJob.attempts + 1,
+                        lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                        updated_at=now,
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                if claimed.rowcount != 1:
+                    return None
+                result = await session.execute(select(SummaryJob).where(SummaryJob.id == job_id))
+                job = result.scalar_one()
+        return job
+
+    async def heartbeat(self, job_id: int, worker_id: str) -> bool:
+        now = datetime.now(timezone.utc)
+        async with self.async_session() as session:
+            async with session.begin():
+                result = await session.execute(
+                    update(SummaryJob)
+                    .where(SummaryJob.id == job_id, SummaryJob.worker_id == worker_id, SummaryJob.status == RUNNING)
+                    .values(lease_expires_at=now + timedelta(seconds=self.lease_seconds), updated_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+        return result.rowcount == 1
+
+    async def complete(self, job_id: int, worker_id: str, summary: str) -> bool:
+        now = datetime.now(timezone.utc)
+        async with self.async_session() as session:
+            async with session.begin():
+                result = await session.execute(
+                    update(SummaryJob)
+                    .where(SummaryJob.id == job_id, SummaryJob.worker_id == worker_id, SummaryJob.status == RUNNING)
+                    .values(status=DONE, result=summary, conversation=None, lease_expires_at=None, updated_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+        return result.rowcount == 1
+
+    async def fail(self, job_id: int, worker_id: str, error: str, attempts: int, max_attempts: int) -> bool:
+        now = datetime.now(timezone.utc)
+        if attempts < max_attempts:
+            values = dict(status=PENDING, available_at=now + timedelta(seconds=2 ** attempts))
+        else:
+            values = dict(status=FAILED, conversation=None)
+        async with self.async_session() as session:
+            async with session.begin():
+                result = await session.execute(
+                    update(SummaryJob)
+                    .where(SummaryJob.id == job_id, SummaryJob.worker_id == worker_id, SummaryJob.status == RUNNING)
+                    .values(error=error[:2000], lease_expires_at=None, updated_at=now, **values)
+                    .execution_options(synchronize_session=False)
+                )
+        return result.rowcount == 1
@@ -0,0 +1,102 @@
+# bot/launcher.py
+"""
+샤드 범위를 여러 프로세스에 나눠 실행하는 런처.
+
+    python -m bot.launcher --shard-count 16 --processes 4
+    python -m bot.launcher --shard-count auto --processes 2
+
+각 프로세스는 SHARD_COUNT/SHARD_IDS 환경 변수를 받아 bot.main 을 AutoShardedBot 으로 실행합니다.
+METRICS_PORT 가 지정된 경우 프로세스마다 METRICS_PORT + 프로세스 번호를 사용합니다.
+비정상 종료된 프로세스는 지수 백오프로 재시작합니다.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import sys
+
+import aiohttp
+from dotenv import load_dotenv
+
+logger = logging.getLogger('discord_summary_bot.launcher')
+
+GATEWAY_BOT_URL = "https://discord.com/api/v10/gateway/bot"
+
+
+# 디스코드가 권장하는 샤드 수 조회
+async def fetch_recommended_shards(token: str) -> int:
+    headers = {"Authorization": f"Bot {token}"}
+    async with aiohttp.ClientSession() as session:
+        async with session.get(GATEWAY_BOT_URL, headers=headers) as response:
+            response.raise_for_status()
+            data = await response.json()
+    return int(data["shards"])
+
+
+# 샤드 0..count-1 을 processes 개의 연속 범위로 분할
+def split_shards(count: int, processes: int) -> list:
+    processes = max(1, min(processes, count))
+    base, extra = divmod(count, processes)
+    ranges = []
+    start = 0
+    for index in range(processes):
+        size = base + (1 if index < extra else 0)
+        ranges.append((start, start + size - 1))
+        start += size
+    return ranges
+
+
+async def supervise(index: int, shard_count: int, shard_range, stopping: asyncio.Event):
+    env = dict(os.environ)
+    env['SHARD_COUNT'] = str(shard_count)
+    env['SHARD_IDS'] = f"{shard_range[0]}-{shard_range[1]}"
+    if os.getenv('METRICS_PORT'):
+        env['METRICS_PORT'] = str(int(os.getenv('METRICS_PORT')) + index)
+
+    backoff = 1
+    while not stopping.is_set():
+        logger.info("프로세스 %s 시작: 샤드 %s / %s", index, env['SHARD_IDS'], shard_count)
+        process = await asyncio.create_subprocess_exec(sys.executable, '-m', 'bot.main', env=env)
+        waiter = asyncio.create_task(process.wait())
+        stopper = asyncio.create_task(stopping.wait())
+        await asyncio.wait({waiter, stopper}, return_when=asyncio.FIRST_COMPLETED)
+        if stopping.is_set():
+            if process.returncode is None:
+                process.terminate()
+                await process.wait()
+            waiter.cancel()
+            return
+        stopper.cancel()
+        logger.warning("프로세스 %s 종료 (코드 %s), %s초 후 재시작", index, process.returncode, backoff)
+        await asyncio.sleep(backoff)
+        backoff = min(backoff * 2, 60)
+
+
+async def main(args):
+    if args.shard_count == 'auto':
+        shard_count = await fetch_recommended_shards(os.getenv('DISCORD_TOKEN'))
+        logger.info("디스코드 권장 샤드 수: %s", shard_count)
+    else:
+        shard_count = int(args.shard_count)
+
+    processes = args.processes or os.cpu_count() or 1
+    ranges = split_shards(shard_count, processes)
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    await asyncio.gather(*(supervise(index, shard_count, shard_range, stopping)
+                           for index, shard_range in enumerate(ranges)))
+
+
+if __name__ == '__main__':
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s:%(levelname)s:%(name)s: %(message)s')
+    parser = argparse.ArgumentParser(description="샤드 범위별 멀티 프로세스 런처")
+    parser.add_argument('--shard-count', default=os.getenv('SHARD_COUNT', 'auto'), help="전체 샤드 수 또는 'auto'")
+    parser.add_argument('--processes', type=int, help="실행할 프로세스 수 (기본값: CPU 코어 수)")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,153 @@
+# bot/logconfig.py
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+from bot import metrics
+from bot.tracing import TraceIdFilter
+
+# 로그에 포함할 대화/응답/요약 본문의 최대 길이 (문자)
+PAYLOAD_LIMIT = int(os.getenv('LOG_PAYLOAD_LIMIT', '500'))
+
+TEXT_FORMAT = '%(asctime)s:%(levelname)s:%(name)s: %(message)s'
+TRACE_TEXT_FORMAT = '%(asctime)s:%(levelname)s:%(name)s:[%(trace_id)s] %(message)s'
+
+
+class _Clipped:
+    """로그 인자로 넘긴 긴 문자열을 실제로 출력될 때만 잘라서 문자열로 만듭니다."""
+
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value, limit):
+        self.value = value
+        self.limit = limit
+
+    def __str__(self):
+        text = self.value if isinstance(self.value, str) else str(self.value)
+        if len(text) <= self.limit:
+            return text
+        return f"{text[:self.limit]}… ({len(text)}자 중 {self.limit}자)"
+
+
+def clip(value, limit=None) -> _Clipped:
+    return _Clipped(value, limit or PAYLOAD_LIMIT)
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        trace_id = getattr(record, "trace_id", None)
+        if trace_id and trace_id != '-':
+            payload["trace_id"] = trace_id
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    같은 메시지 템플릿(%-style 포맷 문자열)의 INFO 이하 로그가 window 초 동안 burst 회를 넘으면
+    그 이후로는 rate 회에 한 번만 통과시킵니다. WARNING 이상은 항상 통과합니다.
+    """
+
+    def __init__(self, burst=20, rate=10, window=60.0):
+        super().__init__()
+        self.burst = burst
+        self.rate = rate
+        self.window = window
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._window_started = time.monotonic()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or self.rate <= 1:
+            return True
+        key = (record.name, record.msg if isinstance(record.msg, str) else id(record.msg))
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_started >= self.window:
+                self._counts.clear()
+                self._window_started = now
+            count = self._counts.get(key, 0) + 1
+            self._counts[key] = count
+        if count <= self.burst or (count - self.burst) % self.rate == 0:
+            return True
+        metrics.LOG_RECORDS_SAMPLED.inc()
+        return False
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    레코드를 포맷하지 않고 그대로 큐에 넣는 핸들러.
+    메시지 포맷과 출력은 QueueListener 스레드에서 처리하고, 큐가 가득 차면 기다리지 않고 버립니다.
+    """
+
+    def prepare(self, record):
+        # 기본 구현은 여기서 메시지를 포맷하므로 호출 스레드(이벤트 루프)에서 비용이 발생함
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.LOG_RECORDS_DROPPED.inc()
+
+
+def setup_logging(logger_name='discord_summary_bot', level=None, log_format=None, trace_ids=None):
+    """
+    큐 기반 로깅 설정. 반환된 QueueListener 는 프로세스 종료 시 자동으로 중지되어 남은 로그를 모두 출력합니다.
+
+    LOG_LEVEL (기본값 INFO), LOG_FORMAT (text | json), LOG_TRACE_IDS, LOG_QUEUE_SIZE,
+    LOG_SAMPLE_BURST / LOG_SAMPLE_RATE / LOG_SAMPLE_WINDOW
+    (샘플링, 기본값은 비활성화(LOG_SAMPLE_RATE=1). 감사용 INFO 로그까지 줄어들 수 있으므로
+    청크 단위 로그가 많은 환경에서만 2 이상으로 설정하세요.)
+    """
+    level = level or os.getenv('LOG_LEVEL', 'INFO').upper()
+    log_format = log_format or os.getenv('LOG_FORMAT', 'text')
+    if trace_ids is None:
+        trace_ids = os.getenv('LOG_TRACE_IDS', 'false').lower() in ('1', 'true', 'yes')
+
+    output = logging.StreamHandler(sys.stdout)
+    if log_format == 'json':
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter(TRACE_TEXT_FORMAT if trace_ids else TEXT_FORMAT))
+
+    log_queue = queue.Queue(maxsize=int(os.getenv('LOG_QUEUE_SIZE', '10000')))
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    # trace_id 는 컨텍스트 변수이므로 로그를 남긴 시점(호출 스레드)에 기록해야 함
+    if trace_ids or log_format == 'json':
+        queue_handler.addFilter(TraceIdFilter())
+    queue_handler.addFilter(SamplingFilter(
+        burst=int(os.getenv('LOG_SAMPLE_BURST', '20')),
+        rate=int(os.getenv('LOG_SAMPLE_RATE', '1')),
+        window=float(os.getenv('LOG_SAMPLE_WINDOW', '60')),
+    ))
+
+    logger = logging.getLogger(logger_name)
+    logger.setLevel(level)
+    logger.addHandler(queue_handler)
+
+    listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    listener.start()
+    atexit.register(stop_listener, listener)
+    return listener
+
+
+def stop_listener(listener):
+    # 이미 중지된 리스너를 다시 중지하면 오류가 발생함
+    if listener._thread is not None:
+        listener.stop()
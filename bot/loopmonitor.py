@@ -0,0 +1,194 @@
+# bot/loopmonitor.py
+
+import asyncio
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+
+logger = logging.getLogger('discord_summary_bot.loopmonitor')
+
+
+class LoopLagMonitor:
+    """
+    이벤트 루프 지연(lag) 감시기.
+
+    루프 안에서는 일정 간격으로 하트비트 콜백을 예약해 실제 실행 시각과 예정 시각의 차이를 측정하고,
+    별도 감시 스레드는 하트비트가 임계값 이상 멈추면 루프 스레드의 스택과 현재 태스크를 샘플링합니다.
+    샘플링 확률과 보고 주기당 스택 수를 제한해 운영 환경에서도 오버헤드가 일정하게 유지됩니다.
+    """
+
+    def __init__(self, interval=0.5, threshold=0.1, stack_sample_rate=1.0, max_stacks_per_report=5,
+                 report_interval=60.0, stack_depth=20, history_size=2048):
+        self.interval = interval
+        self.threshold = threshold
+        self.stack_sample_rate = stack_sample_rate
+        self.max_stacks_per_report = max_stacks_per_report
+        self.report_interval = report_interval
+        self.stack_depth = stack_depth
+
+        self._loop = None
+        self._loop_thread_id = None
+        self._handle = None
+        self._thread = None
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+
+        self._beat_seq = 0
+        self._last_beat = 0.0
+        self._next_expected = 0.0
+        self._sampled_seq = -1
+        self._current_sample = None
+
+        # 보고 주기 단위 통계
+        self._lags = deque(maxlen=history_size)
+        self._slow_events = []
+        self._owner_blocked = Counter()
+        self._stacks_in_window = 0
+        self._last_report = None
+        self._totals = {"beats": 0, "slow": 0, "max_lag": 0.0}
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            interval=float(os.getenv('LOOP_MONITOR_INTERVAL', '0.5')),
+            threshold=float(os.getenv('LOOP_LAG_THRESHOLD_MS', '100')) / 1000,
+            stack_sample_rate=float(os.getenv('LOOP_STACK_SAMPLE_RATE', '1.0')),
+            max_stacks_per_report=int(os.getenv('LOOP_MAX_STACKS_PER_REPORT', '5')),
+            report_interval=float(os.getenv('LOOP_MONITOR_REPORT_INTERVAL', '60')),
+        )
+
+    @staticmethod
+    def enabled_from_env() -> bool:
+        return os.getenv('LOOP_MONITOR_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._loop_thread_id = threading.get_ident()
+        now = time.monotonic()
+        self._last_beat = now
+        self._next_expected = now + self.interval
+        self._last_report = now
+        self._handle = loop.call_later(self.interval, self._beat)
+        self._thread = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._thread.start()
+        logger.info("이벤트 루프 감시 시작: 간격=%ss, 임계값=%.0fms", self.interval, self.threshold * 1000)
+
+    def stop(self):
+        self._stopped.set()
+        if self._handle is not None:
+            self._handle.cancel()
+
+    # 루프 스레드에서 실행되는 하트비트
+    def _beat(self):
+        now = time.monotonic()
+        lag = max(0.0, now - self._next_expected)
+        with self._lock:
+            self._beat_seq += 1
+            self._last_beat = now
+            self._lags.append(lag)
+            self._totals["beats"] += 1
+            self._totals["max_lag"] = max(self._totals["max_lag"], lag)
+            if lag >= self.threshold:
+                sample = self._current_sample or {"owner": "unknown", "site": None, "stack": None}
+                self._slow_events.append({"lag": lag, "at": time.time(), **sample})
+                self._owner_blocked[sample["owner"]] += lag
+                self._totals["slow"] += 1
+            self._current_sample = None
+        self._next_expected = now + self.interval
+        if not self._stopped.is_set():
+            self._handle = self._loop.call_later(self.interval, self._beat)
+
+    # 감시 스레드: 하트비트가 멈춘 동안 루프 스레드를 샘플링하고 주기적으로 요약을 남김
+    def _watch(self):
+        poll = max(0.01, min(self.interval, self.threshold) / 2)
+        while not self._stopped.wait(poll):
+            now = time.monotonic()
+            with self._lock:
+                stalled_for = now - self._last_beat - self.interval
+                seq = self._beat_seq
+                need_sample = stalled_for >= self.threshold and self._sampled_seq != seq
+                if need_sample:
+                    self._sampled_seq = seq
+            if need_sample:
+                sample = self._sample()
+                with self._lock:
+                    if self._beat_seq == seq:
+                        self._current_sample = sample
+            if now - self._last_report >= self.report_interval:
+                self._last_report = now
+                self._report()
+
+    def _sample(self) -> dict:
+        owner = "unknown"
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            task = None
+        if task is not None:
+            coro = task.get_coro()
+            owner = f"{task.get_name()}:{getattr(coro, '__qualname__', type(coro).__name__)}"
+
+        stack = None
+        site = None
+        with self._lock:
+            take_stack = (self._stacks_in_window < self.max_stacks_per_report
+                          and random.random() < self.stack_sample_rate)
+            if take_stack:
+                self._stacks_in_window += 1
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is not None:
+            summary = traceback.extract_stack(frame, limit=self.stack_depth)
+            # 가장 안쪽의 봇 코드 프레임을 지연을 일으킨 명령/코루틴 위치로 사용
+            for entry in reversed(summary):
+                if f"{os.sep}bot{os.sep}" in entry.filename:
+                    site = f"{os.path.basename(entry.filename)}:{entry.name}:{entry.lineno}"
+                    break
+            if take_stack:
+                stack = "".join(traceback.format_list(summary))
+        if site:
+            owner = f"{owner} @ {site}"
+        return {"owner": owner, "site": site, "stack": stack}
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lags = sorted(self._lags)
+            slow = list(self._slow_events)
+            owners = self._owner_blocked.most_common(10)
+            totals = dict(self._totals)
+
+        def pct(p):
+            if not lags:
+                return 0.0
+            return lags[min(len(lags) - 1, int(p * len(lags)))]
+
+        return {
+            "lag_p50_ms": pct(0.50) * 1000,
+            "lag_p99_ms": pct(0.99) * 1000,
+            "lag_max_ms": (lags[-1] if lags else 0.0) * 1000,
+            "slow_callbacks": len(slow),
+            "top_owners": [{"owner": owner, "blocked_ms": blocked * 1000} for owner, blocked in owners],
+            "recent": [{k: v for k, v in event.items() if k != "stack"} for event in slow[-10:]],
+            "stacks": [event["stack"] for event in slow if event.get("stack")],
+            "totals": totals,
+        }
+
+    def _report(self):
+        snap = self.snapshot()
+        with self._lock:
+            self._lags.clear()
+            self._slow_events.clear()
+            self._owner_blocked.clear()
+            self._stacks_in_window = 0
+        logger.info(
+            f"이벤트 루프 지연 요약: p50={snap['lag_p50_ms']:.1f}ms, p99={snap['lag_p99_ms']:.1f}ms, "
+            f"최대={snap['lag_max_ms']:.1f}ms, 느린 콜백={snap['slow_callbacks']}건"
+        )
+        for entry in snap["top_owners"][:3]:
+            logger.info("  지연 원인: %s (%.0fms)", entry['owner'], entry['blocked_ms'])
+        for stack in snap["stacks"]:
+            logger.warning("이벤트 루프 블로킹 스택 샘플:\n%s", stack)
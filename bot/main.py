@@ -8,9 +8,17 @@ from dotenv import load_dotenv
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from bot.models import Base
+from bot.loopmonitor import LoopLagMonitor
+from bot import metrics
+from bot.logconfig import setup_logging
 import logging
-import sys
 import asyncio
+import hashlib
+import json
+import time
+
+# 프로세스 시작 시각 (준비 완료까지 걸린 시간 측정용)
+PROCESS_STARTED = time.perf_counter()
 
 # 환경 변수 로드
 load_dotenv()
@@ -18,16 +26,37 @@ load_dotenv()
 DISCORD_TOKEN = os.getenv('DISCORD_TOKEN')
 DATABASE_URL = os.getenv('DATABASE_URL')
 SENTRY_DSN = os.getenv('SENTRY_DSN')  # 선택 사항
+# 트레이스 수집 비율 (1.0 은 모든 트랜잭션을 수집하므로 운영 환경에서는 낮게 유지)
+SENTRY_TRACES_SAMPLE_RATE = float(os.getenv('SENTRY_TRACES_SAMPLE_RATE', '0.1'))
+# 메트릭 HTTP 서버 (포트를 지정한 경우에만 실행)
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = os.getenv('METRICS_PORT')
+# 로그에 요청별 추적 ID 출력 여부
+LOG_TRACE_IDS = os.getenv('LOG_TRACE_IDS', 'false').lower() in ('1', 'true', 'yes')
+
+# 게이트웨이 캐시 설정 (요약 기능은 멤버 목록을 사용하지 않으므로 기본적으로 최소화)
+INTENT_MEMBERS = os.getenv('INTENT_MEMBERS', 'false').lower() in ('1', 'true', 'yes')
+GATEWAY_LEAN_INTENTS = os.getenv('GATEWAY_LEAN_INTENTS', 'true').lower() in ('1', 'true', 'yes')
+MEMBER_CACHE = os.getenv('MEMBER_CACHE', 'none')  # none | intents | all
+MESSAGE_CACHE_SIZE = int(os.getenv('MESSAGE_CACHE_SIZE', '0'))  # 0 이면 메시지 캐시 비활성화
+CHUNK_GUILDS_AT_STARTUP = os.getenv('CHUNK_GUILDS_AT_STARTUP', 'false').lower() in ('1', 'true', 'yes')
+
+# 샤딩 설정 (SHARD_COUNT 를 지정하면 AutoShardedBot 사용, 'auto' 는 디스코드 권장값)
+SHARD_COUNT = os.getenv('SHARD_COUNT')
+SHARD_IDS = os.getenv('SHARD_IDS')  # 예: "0-3" 또는 "0,1,2,3"
 
-# 로깅 설정
+# 시작 시 create_all 실행 여부 (alembic 으로 스키마를 관리하는 경우 false)
+DB_CREATE_ALL = os.getenv('DB_CREATE_ALL', 'true').lower() in ('1', 'true', 'yes')
+# 슬래시 명령어 동기화 방식: hash (변경 시에만) | always | never
+COMMAND_SYNC = os.getenv('COMMAND_SYNC', 'hash')
+COMMAND_SYNC_CACHE = os.getenv('COMMAND_SYNC_CACHE', 'data/command_sync_hash')
+
+# 로깅 설정 (큐 기반: 포맷과 출력은 백그라운드 스레드에서 처리)
 logger = logging.getLogger('discord_summary_bot')
-logger.setLevel(logging.INFO)
-handler = logging.StreamHandler(sys.stdout)
-handler.setFormatter(logging.Formatter('%(asctime)s:%(levelname)s:%(name)s: %(message)s'))
-logger.addHandler(handler)
+log_listener = setup_logging(trace_ids=LOG_TRACE_IDS)
 
-# (선택 사항) Sentry 통합
-if SENTRY_DSN:
+# (선택 사항) Sentry 통합 - 임포트 비용이 크므로 실행 시점에 지연 로딩
+def init_sentry():
     import sentry_sdk
     from sentry_sdk.integrations.logging import LoggingIntegration
 
@@ -39,66 +68,217 @@ if SENTRY_DSN:
     sentry_sdk.init(
         dsn=SENTRY_DSN,
         integrations=[sentry_logging],
-        traces_sample_rate=1.0
+        traces_sample_rate=SENTRY_TRACES_SAMPLE_RATE
     )
     logger.info("Sentry 초기화 완료.")
 
+# 샤드 ID 목록 파싱 ("0-3,8" -> [0, 1, 2, 3, 8])
+def parse_shard_ids(value):
+    if not value:
+        return None
+    shard_ids = []
+    for part in value.split(','):
+        part = part.strip()
+        if '-' in part:
+            first, last = part.split('-', 1)
+            shard_ids.extend(range(int(first), int(last) + 1))
+        elif part:
+            shard_ids.append(int(part))
+    return shard_ids
+
+
+def build_member_cache_flags(intents):
+    if MEMBER_CACHE == 'all':
+        return discord.MemberCacheFlags.all()
+    if MEMBER_CACHE == 'intents':
+        return discord.MemberCacheFlags.from_intents(intents)
+    return discord.MemberCacheFlags.none()
+
+
 # Intents 설정
-intents = discord.Intents.default()
+if GATEWAY_LEAN_INTENTS:
+    # 슬래시 명령어와 REST 로 메시지를 읽는 데 필요한 인텐트만 사용 (길드 메시지/타이핑/반응 이벤트 수신 안 함)
+    intents = discord.Intents.none()
+    intents.dm_messages = True
+else:
+    intents = discord.Intents.default()
 intents.message_content = True  # 메시지 내용 인텐트 활성화
 intents.guilds = True
-intents.members = True        # 서버 멤버 인텐트 활성화 (필요 시)
+intents.members = INTENT_MEMBERS  # 서버 멤버 인텐트 (필요 시 INTENT_MEMBERS=true)
 
-# 봇 초기화 (명령어 프리픽스는 슬래시 명령어이므로 필요 없음)
-bot = commands.Bot(command_prefix='!', intents=intents, logger=logger)
+bot_options = dict(
+    command_prefix='!',
+    intents=intents,
+    logger=logger,
+    member_cache_flags=build_member_cache_flags(intents),
+    max_messages=MESSAGE_CACHE_SIZE or None,
+    chunk_guilds_at_startup=CHUNK_GUILDS_AT_STARTUP,
+    # 봇 상태는 IDENTIFY 에 포함시켜 재연결마다 change_presence 를 호출하지 않음
+    activity=discord.Activity(type=discord.ActivityType.watching, name="대화를 요약해요"),
+)
 
 # SQLAlchemy Async Engine 및 Session 생성
 engine = create_async_engine(DATABASE_URL, echo=False)
 async_session = sessionmaker(
     engine, expire_on_commit=False, class_=AsyncSession
 )
+metrics.register_engine(engine)
+
+# 이벤트 루프 지연 감시기
+loop_monitor = LoopLagMonitor.from_env()
 
-# Cog 임포트
-from bot.cogs.summary import Summary
 
-# Cog 로딩
-@bot.event
-async def on_ready():
-    logger.info(f'Logged in as {bot.user} (ID: {bot.user.id})')
-    logger.info('------')
+# 데이터베이스 초기화 (create_all)
+async def init_database():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    logger.info("데이터베이스 연결 및 초기화 완료.")
+
+
+# 로컬 명령어 트리의 해시 (변경이 없으면 동기화를 건너뛰기 위해 사용)
+def command_tree_hash(tree) -> str:
+    payload = sorted((command.to_dict() for command in tree.get_commands()), key=lambda command: command['name'])
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def read_sync_cache() -> str:
     try:
-        await bot.add_cog(Summary(bot, async_session))
-        logger.info('Summary Cog loaded successfully.')
-    except Exception as e:
-        logger.error(f'Failed to load Summary Cog: {e}')
+        with open(COMMAND_SYNC_CACHE, encoding='utf-8') as f:
+            return f.read().strip()
+    except OSError:
+        return ''
 
-    # 봇 상태 설정
-    await bot.change_presence(activity=discord.Activity(type=discord.ActivityType.watching, name="대화를 요약해요"))
-    logger.info('Bot status set successfully.')
 
-    # 슬래시 명령어 동기화
+def write_sync_cache(value: str):
     try:
-        synced = await bot.tree.sync()
-        logger.info(f'Synced {len(synced)} command(s).')
-    except Exception as e:
-        logger.error(f'Failed to sync commands: {e}')
+        directory = os.path.dirname(COMMAND_SYNC_CACHE)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(COMMAND_SYNC_CACHE, 'w', encoding='utf-8') as f:
+            f.write(value)
+    except OSError as e:
+        logger.warning("명령어 동기화 캐시 저장 실패: %s", e)
+
+
+class SummaryBotMixin:
+    """
+    Cog/View 등록과 명령어 동기화를 setup_hook 에서 한 번만 수행하는 봇 공통 로직.
+    on_ready 는 재연결마다 다시 호출되므로 가벼운 작업만 처리합니다.
+    """
+
+    db_init_task = None
+    ready_count = 0
+    disconnected_at = None
+
+    async def setup_hook(self):
+        # Cog 임포트 (실행 시점에 로딩)
+        from bot.cogs.summary import Summary
+
+        await self.add_cog(Summary(self, async_session))
+        logger.info('Summary Cog loaded successfully.')
+
+        await self.sync_commands()
+
+        # 로그인과 병렬로 진행한 데이터베이스 초기화가 끝날 때까지 대기
+        if self.db_init_task is not None:
+            try:
+                await self.db_init_task
+            except Exception as e:
+                logger.error("데이터베이스 초기화 오류: %s", e)
+                raise
+
+    async def sync_commands(self):
+        if COMMAND_SYNC == 'never':
+            return
+        # 샤드를 여러 프로세스로 나눈 경우 샤드 0 을 가진 프로세스만 동기화
+        shard_ids = getattr(self, 'shard_ids', None)
+        if shard_ids is not None and 0 not in shard_ids:
+            return
+        cache_key = f"{self.application_id}:{command_tree_hash(self.tree)}"
+        if COMMAND_SYNC == 'hash' and read_sync_cache() == cache_key:
+            logger.info('명령어 변경 사항이 없어 동기화를 건너뜁니다.')
+            return
+        try:
+            synced = await self.tree.sync()
+            write_sync_cache(cache_key)
+            logger.info('Synced %s command(s).', len(synced))
+        except Exception as e:
+            logger.error('Failed to sync commands: %s', e)
+
+    async def on_ready(self):
+        self.ready_count += 1
+        if self.ready_count == 1:
+            elapsed = time.perf_counter() - PROCESS_STARTED
+            metrics.BOT_STARTUP_SECONDS.set(elapsed)
+            logger.info('Logged in as %s (ID: %s)', self.user, self.user.id)
+            logger.info('준비 완료까지 %.2f초', elapsed)
+            logger.info('------')
+        else:
+            self.record_recovery('ready')
+
+    async def on_resumed(self):
+        self.record_recovery('resumed')
+
+    async def on_disconnect(self):
+        if self.disconnected_at is None:
+            self.disconnected_at = time.perf_counter()
+        metrics.GATEWAY_DISCONNECTS.inc()
+
+    def record_recovery(self, kind):
+        if self.disconnected_at is None:
+            return
+        elapsed = time.perf_counter() - self.disconnected_at
+        self.disconnected_at = None
+        metrics.GATEWAY_RECOVERY_SECONDS.observe(elapsed, kind=kind)
+        logger.info('게이트웨이 재연결 완료 (%s): %.2f초', kind, elapsed)
+
+
+class SummaryBot(SummaryBotMixin, commands.Bot):
+    pass
+
+
+class ShardedSummaryBot(SummaryBotMixin, commands.AutoShardedBot):
+    pass
+
+
+# 봇 초기화 (명령어 프리픽스는 슬래시 명령어이므로 필요 없음)
+if SHARD_COUNT:
+    if SHARD_COUNT != 'auto':
+        bot_options['shard_count'] = int(SHARD_COUNT)
+    shard_ids = parse_shard_ids(SHARD_IDS)
+    if shard_ids is not None:
+        bot_options['shard_ids'] = shard_ids
+    bot = ShardedSummaryBot(**bot_options)
+    logger.info("샤딩 사용: 샤드 수=%s, 샤드 ID=%s", SHARD_COUNT, shard_ids)
+else:
+    bot = SummaryBot(**bot_options)
 
 # 봇 실행 전 초기화
 async def main():
-    # 필요한 경우 데이터베이스 초기화
-    try:
-        async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
-        logger.info("데이터베이스 연결 및 초기화 완료.")
-    except Exception as e:
-        logger.error(f"데이터베이스 초기화 오류: {e}")
-        return
+    if SENTRY_DSN:
+        init_sentry()
+
+    # 이벤트 루프 지연 감시 시작
+    if LoopLagMonitor.enabled_from_env():
+        loop_monitor.start(asyncio.get_running_loop())
+        metrics.register_loop_monitor(loop_monitor)
+
+    # 메트릭 서버 시작
+    if METRICS_PORT:
+        try:
+            await metrics.start_metrics_server(METRICS_HOST, int(METRICS_PORT), loop_monitor)
+        except OSError as e:
+            logger.error("메트릭 서버 시작 오류: %s", e)
+
+    # 필요한 경우 데이터베이스 초기화 (로그인과 병렬로 진행하고 setup_hook 에서 완료를 기다림)
+    if DB_CREATE_ALL:
+        bot.db_init_task = asyncio.create_task(init_database())
 
     # 봇 시작
     try:
         await bot.start(DISCORD_TOKEN)
     except Exception as e:
-        logger.error(f"봇 시작 오류: {e}")
+        logger.error("봇 시작 오류: %s", e)
 
 # 실행
 if __name__ == '__main__':
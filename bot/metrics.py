@@ -0,0 +1,231 @@
+# bot/metrics.py
+
+import bisect
+import json
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger('discord_summary_bot.metrics')
+
+# 요약 파이프라인 지연 시간 버킷 (초)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+# 메시지/청크 개수 버킷
+COUNT_BUCKETS = (1, 5, 10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000)
+
+
+def _format_labels(labelnames, values, extra=None) -> str:
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: 레이블이 일치하지 않습니다: {sorted(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value) -> list:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [버킷별 개수..., 합계, 전체 개수]
+                state = self._values[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _render_sample(self, key, state) -> list:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, state):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key, ("le", "+Inf"))
+        lines.append(f"{self.name}_bucket{labels} {state[-1]}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(state[-2])}")
+        lines.append(f"{self.name}_count{labels} {state[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    # 스크레이프 직전에 호출되어 게이지 값을 갱신하는 콜백 등록
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                logger.error("메트릭 수집 콜백 오류: %s", e)
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+SUMMARY_STAGE_SECONDS = REGISTRY.register(Histogram(
+    "summary_stage_seconds", "요약 파이프라인 단계별 소요 시간", ("stage",)))
+SUMMARY_REQUESTS = REGISTRY.register(Counter(
+    "summary_requests_total", "요약 요청 수 (결과별)", ("outcome",)))
+SUMMARY_MESSAGES = REGISTRY.register(Histogram(
+    "summary_messages", "요약 요청당 수집된 메시지 수", buckets=COUNT_BUCKETS))
+SUMMARY_CHUNKS = REGISTRY.register(Histogram(
+    "summary_chunks", "요약 요청당 청크 수", buckets=COUNT_BUCKETS))
+GEMINI_REQUESTS = REGISTRY.register(Counter(
+    "gemini_requests_total", "Gemini API 호출 수 (HTTP 상태 코드별)", ("status",)))
+GEMINI_RETRIES = REGISTRY.register(Counter(
+    "gemini_retries_total", "Gemini API 재시도 수"))
+GEMINI_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "gemini_request_seconds", "Gemini API 호출 소요 시간"))
+GEMINI_TOKENS = REGISTRY.register(Counter(
+    "gemini_tokens_total", "Gemini API 토큰 사용량", ("kind",)))
+DB_POOL = REGISTRY.register(Gauge(
+    "db_pool_connections", "데이터베이스 커넥션 풀 상태", ("state",)))
+EVENT_LOOP_LAG = REGISTRY.register(Gauge(
+    "event_loop_lag_seconds", "이벤트 루프 지연 (최근 보고 주기)", ("quantile",)))
+BOT_STARTUP_SECONDS = REGISTRY.register(Gauge(
+    "bot_startup_seconds", "프로세스 시작부터 첫 on_ready 까지 걸린 시간"))
+GATEWAY_DISCONNECTS = REGISTRY.register(Counter(
+    "gateway_disconnects_total", "게이트웨이 연결 끊김 수"))
+GATEWAY_RECOVERY_SECONDS = REGISTRY.register(Histogram(
+    "gateway_recovery_seconds", "게이트웨이 연결 끊김부터 복구까지 걸린 시간", ("kind",)))
+HISTORY_PREFETCH = REGISTRY.register(Counter(
+    "history_prefetch_total", "히스토리 미리 가져오기 결과 (hit: 이전 구간 추가 조회 없음, partial, miss, cancelled)", ("outcome",)))
+SUMMARY_ADMISSION = REGISTRY.register(Counter(
+    "summary_admission_total", "요약 요청 허용 제어 결과 (single_pass, map_reduce, rollup, reject)", ("strategy",)))
+GUILD_BUDGET_CALLS = REGISTRY.register(Counter(
+    "guild_budget_calls_total", "길드 예산에서 예약한 Gemini 호출 수"))
+LOG_RECORDS_DROPPED = REGISTRY.register(Counter(
+    "log_records_dropped_total", "로그 큐가 가득 차 버려진 로그 수"))
+LOG_RECORDS_SAMPLED = REGISTRY.register(Counter(
+    "log_records_sampled_total", "샘플링으로 출력하지 않은 로그 수"))
+
+
+# SQLAlchemy 엔진의 커넥션 풀 상태를 게이지로 노출
+def register_engine(engine):
+    pool = engine.sync_engine.pool
+
+    def collect():
+        for state in ("size", "checkedin", "checkedout", "overflow"):
+            getter = getattr(pool, state, None)
+            if getter is not None:
+                DB_POOL.set(getter(), state=state)
+
+    REGISTRY.add_collector(collect)
+
+
+def register_loop_monitor(monitor):
+    def collect():
+        snap = monitor.snapshot()
+        EVENT_LOOP_LAG.set(snap["lag_p50_ms"] / 1000, quantile="0.5")
+        EVENT_LOOP_LAG.set(snap["lag_p99_ms"] / 1000, quantile="0.99")
+        EVENT_LOOP_LAG.set(snap["lag_max_ms"] / 1000, quantile="1")
+
+    REGISTRY.add_collector(collect)
+
+
+# 로컬 메트릭 HTTP 서버 (/metrics: Prometheus 형식, /debug/loop: 이벤트 루프 감시 결과)
+async def start_metrics_server(host: str, port: int, loop_monitor=None):
+    from aiohttp import web
+
+    async def metrics_handler(request):
+        return web.Response(text=REGISTRY.render(), content_type="text/plain", charset="utf-8")
+
+    async def loop_handler(request):
+        if loop_monitor is None:
+            return web.json_response({"enabled": False})
+        return web.json_response(loop_monitor.snapshot(), dumps=lambda obj: json.dumps(obj, ensure_ascii=False))
+
+    app = web.Application()
+    app.router.add_get("/metrics", metrics_handler)
+    app.router.add_get("/debug/loop", loop_handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    logger.info("메트릭 서버 시작: http://%s:%s/metrics", host, port)
+    return runner
@@ -1,13 +1,17 @@
 # bot/models.py
 
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
 from datetime import datetime, timezone
 
 Base = declarative_base()
 
+# PostgreSQL 에서는 마이그레이션으로 created_at 기준 월별 범위 파티션 테이블로 생성됨 (PK: id, created_at)
 class Summary(Base):
     __tablename__ = 'summaries'
+    __table_args__ = (
+        Index('ix_summaries_user_id_created_at', 'user_id', 'created_at'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     guild_id = Column(String, index=True)
@@ -16,4 +20,35 @@ class Summary(Base):
     start_time = Column(DateTime(timezone=True))
     end_time = Column(DateTime(timezone=True))
     summary = Column(Text)
+    summary_level = Column(String(16))
+    source = Column(String(16))  # messages | rollup | resummary (롤업은 messages 만 재사용)
+    created_at = Column(DateTime(timezone=True), nullable=False, index=True, default=lambda: datetime.now(timezone.utc))
+
+# 서버별 요약본 보관 기간 (행이 없으면 SUMMARY_RETENTION_DAYS 기본값, 0 이면 영구 보관)
+class GuildRetention(Base):
+    __tablename__ = 'guild_retention'
+
+    guild_id = Column(String, primary_key=True)
+    retention_days = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+class SummaryJob(Base):
+    __tablename__ = 'summary_jobs'
+
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String(16), index=True, default='pending')  # pending | running | done | failed
+    guild_id = Column(String, index=True)
+    channel_id = Column(String)
+    user_id = Column(String)
+    summary_level = Column(String(16))
+    conversation = Column(Text)
+    result = Column(Text)
+    error = Column(Text)
+    trace_id = Column(String(32))
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    worker_id = Column(String)
+    available_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    lease_expires_at = Column(DateTime(timezone=True))
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
@@ -0,0 +1,343 @@
+# bot/partitions.py
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+import re
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, delete, and_, or_, not_, text, true
+
+from bot.models import Summary as SummaryModel, GuildRetention
+
+logger = logging.getLogger('discord_summary_bot.partitions')
+
+PARENT_TABLE = 'summaries'
+DEFAULT_PARTITION = 'summaries_default'
+# 여러 봇 프로세스 중 하나만 유지보수를 실행하기 위한 advisory lock 키
+MAINTENANCE_LOCK_KEY = 0x53554D4D
+
+_BOUND_RE = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+_SHORT_OFFSET_RE = re.compile(r"([+-]\d\d)$")
+
+
+# pg_get_expr 의 경계값 ('2024-01-01 00:00:00+00') 파싱
+def _parse_bound(value: str) -> datetime:
+    value = _SHORT_OFFSET_RE.sub(r"\1:00", value.strip())
+    return datetime.fromisoformat(value).astimezone(timezone.utc)
+
+
+def month_start(value: datetime) -> datetime:
+    value = value.astimezone(timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(month: datetime, count: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{PARENT_TABLE}_p{month:%Y%m}"
+
+
+def create_partition_sql(month: datetime) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {PARENT_TABLE} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+def _serialize(row) -> str:
+    return json.dumps({
+        "id": row.id,
+        "guild_id": row.guild_id,
+        "channel_id": row.channel_id,
+        "user_id": row.user_id,
+        "start_time": row.start_time.isoformat() if row.start_time else None,
+        "end_time": row.end_time.isoformat() if row.end_time else None,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+        "summary": row.summary,
+        "summary_level": row.summary_level,
+        "source": row.source,
+    }, ensure_ascii=False)
+
+
+class _ArchiveWriter:
+    """gzip JSONL 보관 파일. 임시 파일에 쓴 뒤 close() 에서 fsync 후 최종 이름으로 교체합니다."""
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.count = 0
+        self._file = gzip.open(self.tmp_path, "wt", encoding="utf-8")
+
+    def write(self, lines):
+        for line in lines:
+            self._file.write(line)
+            self._file.write("\n")
+        self.count += len(lines)
+
+    def close(self):
+        self._file.close()
+        with open(self.tmp_path, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self._file.close()
+        os.remove(self.tmp_path)
+
+
+def _write_archive(path, lines):
+    writer = _ArchiveWriter(path)
+    try:
+        writer.write(lines)
+    except BaseException:
+        writer.abort()
+        raise
+    writer.close()
+
+
+class PartitionManager:
+    """
+    summaries 테이블의 월별 파티션 생성과 보관 기간 만료 요약본의 아카이브를 담당합니다.
+
+    - PostgreSQL 파티션 테이블이면 앞으로 months_ahead 개월치 파티션을 미리 만들고,
+      모든 행이 만료된 지난 달 파티션은 통째로 gzip JSONL 로 보관한 뒤 DETACH/DROP 합니다.
+    - 보관 기간이 서버마다 달라 일부 행만 만료된 경우에는 만료된 행만 배치로 보관 후 삭제합니다.
+      (파티션 테이블이 아니거나 SQLite 등 다른 DB 에서도 이 방식으로 동작)
+    """
+
+    def __init__(self, async_session, months_ahead=3, default_retention_days=0, archive_dir='data/archive', batch_size=1000):
+        self.async_session = async_session
+        self.months_ahead = months_ahead
+        self.default_retention_days = default_retention_days
+        self.archive_dir = archive_dir
+        self.batch_size = batch_size
+
+    @classmethod
+    def from_env(cls, async_session):
+        return cls(
+            async_session,
+            months_ahead=int(os.getenv('PARTITION_MONTHS_AHEAD', '3')),
+            default_retention_days=int(os.getenv('SUMMARY_RETENTION_DAYS', '0')),
+            archive_dir=os.getenv('SUMMARY_ARCHIVE_DIR', 'data/archive'),
+            batch_size=int(os.getenv('SUMMARY_ARCHIVE_BATCH_SIZE', '1000')),
+        )
+
+    @staticmethod
+    async def is_partitioned(session) -> bool:
+        if session.bind.dialect.name != 'postgresql':
+            return False
+        result = await session.execute(text(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = :name AND pg_table_is_visible(c.oid)"
+        ), {"name": PARENT_TABLE})
+        return result.scalar() is not None
+
+    @staticmethod
+    async def list_partitions(session) -> list:
+        """(이름, 시작, 끝) 목록. 기본(DEFAULT) 파티션은 제외합니다."""
+        result = await session.execute(text(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :name AND pg_table_is_visible(p.oid)"
+        ), {"name": PARENT_TABLE})
+        partitions = []
+        for name, bound in result:
+            match = _BOUND_RE.search(bound or "")
+            if match:
+                lower, upper = (_parse_bound(value) for value in match.groups())
+                partitions.append((name, lower, upper))
+        return sorted(partitions, key=lambda partition: partition[1])
+
+    async def ensure_partitions(self, now=None) -> list:
+        """이번 달부터 months_ahead 개월 뒤까지의 파티션을 생성합니다."""
+        now = now or datetime.now(timezone.utc)
+        created = []
+        async with self.async_session() as session:
+            if not await self.is_partitioned(session):
+                return created
+            existing = {name for name, _, _ in await self.list_partitions(session)}
+        current = month_start(now)
+        for offset in range(self.months_ahead + 1):
+            month = add_months(current, offset)
+            if partition_name(month) in existing:
+                continue
+            try:
+                async with self.async_session() as session:
+                    async with session.begin():
+                        moved = await self._create_partition(session, month)
+                created.append(partition_name(month))
+                if moved:
+                    logger.info("파티션 생성: %s (기본 파티션에서 %s개 이동)", partition_name(month), moved)
+                else:
+                    logger.info("파티션 생성: %s", partition_name(month))
+            except Exception as e:
+                logger.error("파티션 생성 오류 (%s): %s", partition_name(month), e)
+        return created
+
+    async def _create_partition(self, session, month) -> int:
+        """
+        월 파티션을 생성합니다. 기본 파티션에 이미 해당 월의 행이 있으면 생성이 실패하므로
+        같은 트랜잭션 안에서 그 행들을 임시 테이블로 옮긴 뒤 파티션을 만들고 다시 넣습니다.
+        """
+        bounds = {"lower": month, "upper": add_months(month, 1)}
+        in_month = "created_at >= :lower AND created_at < :upper"
+        stray = await session.execute(
+            text(f"SELECT 1 FROM {DEFAULT_PARTITION} WHERE {in_month} LIMIT 1"), bounds
+        )
+        if stray.scalar() is None:
+            await session.execute(text(create_partition_sql(month)))
+            return 0
+        # CREATE TABLE AS 에는 바인드 파라미터를 쓸 수 없으므로 빈 임시 테이블에 DELETE ... RETURNING 으로 옮김
+        await session.execute(text(f"CREATE TEMPORARY TABLE summaries_moving (LIKE {PARENT_TABLE}) ON COMMIT DROP"))
+        moved = await session.execute(text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE {in_month} RETURNING *) "
+            f"INSERT INTO summaries_moving SELECT * FROM moved"
+        ), bounds)
+        await session.execute(text(create_partition_sql(month)))
+        await session.execute(text(f"INSERT INTO {PARENT_TABLE} SELECT * FROM summaries_moving"))
+        return moved.rowcount
+
+    async def retention_policies(self, session):
+        result = await session.execute(select(GuildRetention.guild_id, GuildRetention.retention_days))
+        return {guild_id: days for guild_id, days in result}
+
+    # 만료 조건: 서버별 설정이 있으면 그 값, 없으면 기본값 (0 이면 만료 없음)
+    def _expired_conditions(self, policies, now) -> list:
+        conditions = []
+        for guild_id, days in policies.items():
+            if days and days > 0:
+                conditions.append((f"guild{guild_id}", and_(
+                    SummaryModel.guild_id == guild_id,
+                    SummaryModel.created_at < now - timedelta(days=days),
+                ), now - timedelta(days=days)))
+        if self.default_retention_days > 0:
+            cutoff = now - timedelta(days=self.default_retention_days)
+            configured = list(policies)
+            guild_filter = or_(SummaryModel.guild_id.is_(None), not_(SummaryModel.guild_id.in_(configured))) \
+                if configured else true()
+            conditions.append(("default", and_(guild_filter, SummaryModel.created_at < cutoff), cutoff))
+        return conditions
+
+    async def _archive_partition(self, name, lower, upper, policies, now, loop) -> list:
+        """파티션의 모든 행이 만료되었으면 통째로 보관 후 분리/삭제하고 ID 목록을 반환합니다."""
+        expired = [condition for _, condition, _ in self._expired_conditions(policies, now)]
+        if not expired:
+            return []
+        async with self.async_session() as session:
+            remaining = await session.execute(
+                select(SummaryModel.id).where(
+                    SummaryModel.created_at >= lower,
+                    SummaryModel.created_at < upper,
+                    not_(or_(*expired)),
+                ).limit(1)
+            )
+            if remaining.scalar() is not None:
+                return []
+
+        path = os.path.join(self.archive_dir, f"{name}.jsonl.gz")
+        writer = await loop.run_in_executor(None, _ArchiveWriter, path)
+        ids = []
+        try:
+            async with self.async_session() as session:
+                stream = await session.stream(text(
+                    f"SELECT id, guild_id, channel_id, user_id, start_time, end_time, created_at, summary, summary_level, source "
+                    f"FROM {name} ORDER BY id"
+                ))
+                async for rows in stream.partitions(self.batch_size):
+                    ids.extend(row.id for row in rows)
+                    lines = [_serialize(row) for row in rows]
+                    await loop.run_in_executor(None, writer.write, lines)
+            await loop.run_in_executor(None, writer.close)
+        except BaseException:
+            await loop.run_in_executor(None, writer.abort)
+            raise
+
+        async with self.async_session() as session:
+            async with session.begin():
+                await session.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+                await session.execute(text(f"DROP TABLE {name}"))
+        logger.info("파티션 보관 완료: %s (%s개) -> %s", name, writer.count, path)
+        return ids
+
+    async def _archive_rows(self, label, condition, cutoff, loop) -> list:
+        """만료된 행을 배치 단위로 보관 후 삭제합니다. 배치마다 보관 파일을 먼저 확정한 뒤 삭제를 커밋합니다."""
+        ids = []
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')
+        batch = 0
+        while True:
+            async with self.async_session() as session:
+                async with session.begin():
+                    # created_at 상한을 함께 걸어 파티션 테이블에서는 만료 구간 파티션만 조회
+                    result = await session.execute(
+                        select(SummaryModel).where(condition, SummaryModel.created_at < cutoff)
+                        .order_by(SummaryModel.created_at).limit(self.batch_size)
+                    )
+                    rows = result.scalars().all()
+                    if not rows:
+                        break
+                    path = os.path.join(self.archive_dir, f"{PARENT_TABLE}_{label}_{stamp}_{batch:04d}.jsonl.gz")
+                    lines = [_serialize(row) for row in rows]
+                    await loop.run_in_executor(None, _write_archive, path, lines)
+                    batch_ids = [row.id for row in rows]
+                    await session.execute(
+                        delete(SummaryModel)
+                        .where(SummaryModel.id.in_(batch_ids), SummaryModel.created_at < cutoff)
+                        .execution_options(synchronize_session=False)
+                    )
+            ids.extend(batch_ids)
+            batch += 1
+            if len(rows) < self.batch_size:
+                break
+        if ids:
+            logger.info("만료된 요약본 보관 완료: %s %s개 (%s개 파일)", label, len(ids), batch)
+        return ids
+
+    async def archive_expired(self, now=None) -> list:
+        """보관 기간이 지난 요약본을 아카이브하고 삭제된 요약 ID 목록을 반환합니다."""
+        now = now or datetime.now(timezone.utc)
+        loop = asyncio.get_running_loop()
+        async with self.async_session() as session:
+            policies = await self.retention_policies(session)
+            partitioned = await self.is_partitioned(session)
+            partitions = await self.list_partitions(session) if partitioned else []
+        conditions = self._expired_conditions(policies, now)
+        if not conditions:
+            return []
+        os.makedirs(self.archive_dir, exist_ok=True)
+
+        archived = []
+        # 가장 짧은 보관 기간보다 이전에 끝나는 파티션만 통째로 보관될 수 있음
+        earliest_cutoff = max(cutoff for _, _, cutoff in conditions)
+        for name, lower, upper in partitions:
+            if upper > earliest_cutoff:
+                break
+            archived.extend(await self._archive_partition(name, lower, upper, policies, now, loop))
+
+        # 남은 만료 행은 배치로 보관 후 삭제 (보관 파일을 먼저 기록한 뒤 같은 트랜잭션에서 삭제)
+        for label, condition, cutoff in conditions:
+            archived.extend(await self._archive_rows(label, condition, cutoff, loop))
+        return archived
+
+    async def run_maintenance(self, now=None) -> list:
+        """파티션 생성과 만료 요약본 보관을 실행합니다. PostgreSQL 에서는 한 프로세스만 실행합니다."""
+        async with self.async_session() as lock_session:
+            postgres = lock_session.bind.dialect.name == 'postgresql'
+            if postgres:
+                locked = (await lock_session.execute(
+                    text("SELECT pg_try_advisory_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY}
+                )).scalar()
+                if not locked:
+                    logger.info("다른 프로세스가 파티션 유지보수를 실행 중입니다.")
+                    return []
+            try:
+                await self.ensure_partitions(now)
+                return await self.archive_expired(now)
+            finally:
+                if postgres:
+                    await lock_session.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MAINTENANCE_LOCK_KEY})
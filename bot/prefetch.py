@@ -0,0 +1,149 @@
+# bot/prefetch.py
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+
+import discord
+
+from bot import metrics
+
+logger = logging.getLogger('discord_summary_bot.prefetch')
+
+
+class HistoryPrefetch:
+    """
+    /요약 실행 직후, 사용자가 요약 수준과 시간대를 고르는 동안 채널 히스토리를 최신 메시지부터 미리 가져옵니다.
+
+    - 시작 시각(anchor) 이전부터 window_start 까지만 가져오며, max_messages/max_chars 를 넘으면 중단합니다.
+    - collect() 는 미리 가져온 구간을 재사용하고, 새로 올라온 메시지(anchor 이후)와
+      아직 가져오지 못한 오래된 구간(마지막으로 가져온 메시지 이전)만 추가로 조회합니다.
+    - View 가 타임아웃되거나 버려지면 cancel() 로 중단하고 버퍼를 비웁니다.
+    """
+
+    def __init__(self, channel, window_start: datetime, max_messages=20000, max_chars=4_000_000):
+        self.channel = channel
+        self.window_start = window_start
+        self.max_messages = max_messages
+        self.max_chars = max_chars
+        self.anchor = datetime.now(timezone.utc)
+        # anchor 시각의 스노우플레이크: 미리 가져오기는 이 ID 미만, 이후 조회는 이 ID 이상
+        self.anchor_id = discord.utils.time_snowflake(self.anchor, high=False)
+        # (created_at, author, content) 최신순, 봇 메시지 제외
+        self.rows = []
+        self.chars = 0
+        # 마지막으로 가져온(가장 오래된) 메시지. 이어서 가져올 때 before 로 사용
+        self.oldest = None
+        self.complete = False
+        self.truncated = False
+        self.claimed = False
+        self._task = None
+
+    @classmethod
+    def from_env(cls, channel, window_start):
+        return cls(
+            channel,
+            window_start,
+            max_messages=int(os.getenv('PREFETCH_MAX_MESSAGES', '20000')),
+            max_chars=int(os.getenv('PREFETCH_MAX_CHARS', '4000000')),
+        )
+
+    @staticmethod
+    def enabled_from_env() -> bool:
+        return os.getenv('HISTORY_PREFETCH', 'true').lower() in ('1', 'true', 'yes')
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def _run(self):
+        try:
+            async for message in self.channel.history(
+                limit=None, before=discord.Object(id=self.anchor_id), after=self.window_start, oldest_first=False
+            ):
+                self.oldest = message
+                if not message.author.bot:
+                    self.rows.append((message.created_at.timestamp(), message.author.display_name, message.content))
+                    self.chars += len(message.content)
+                if len(self.rows) >= self.max_messages or self.chars >= self.max_chars:
+                    self.truncated = True
+                    logger.info("히스토리 미리 가져오기 상한 도달: %s개, %s자", len(self.rows), self.chars)
+                    return
+            self.complete = True
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # 권한 오류 등은 요약 시 다시 조회하면서 사용자에게 안내됨
+            logger.warning("히스토리 미리 가져오기 오류: %s", e)
+
+    def cancel(self):
+        """
+        진행 중인 미리 가져오기를 중단합니다. collect() 가 버퍼를 가져가기 전이면 버퍼와 진행 상태도 초기화해서
+        이후 collect() 가 비운 버퍼를 "이미 가져온 구간"으로 오인하지 않고 전체 구간을 다시 조회하도록 합니다.
+        """
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            if not self.claimed:
+                metrics.HISTORY_PREFETCH.inc(outcome="cancelled")
+        if not self.claimed:
+            self.rows = []
+            self.chars = 0
+            self.oldest = None
+            self.complete = False
+            self.truncated = False
+
+    async def _stop(self):
+        if self._task is None:
+            return
+        if not self._task.done():
+            # 페이지 단위로 진행되므로 중단해도 지금까지 가져온 메시지는 그대로 사용
+            self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def collect(self, start_time: datetime, end_time: datetime) -> list:
+        """start_time~end_time 의 (timestamp, author, content) 목록을 오래된 순으로 반환합니다."""
+        self.claimed = True
+        await self._stop()
+        # history(after=, before=) 와 같은 밀리초 단위 경계
+        start_ts = int(start_time.timestamp() * 1000) / 1000
+        end_ts = int(end_time.timestamp() * 1000) / 1000
+
+        # 1) 새 메시지 (anchor 이후)
+        newer = []
+        if end_time > self.anchor:
+            after = start_time if start_time > self.anchor else discord.Object(id=self.anchor_id - 1)
+            async for message in self.channel.history(limit=None, after=after, before=end_time, oldest_first=True):
+                if not message.author.bot:
+                    newer.append((message.created_at.timestamp(), message.author.display_name, message.content))
+
+        # 2) 미리 가져온 구간
+        covered_from = self.window_start if self.complete else (self.oldest.created_at if self.oldest else self.anchor)
+        cached = [row for row in reversed(self.rows) if start_ts < row[0] < end_ts]
+
+        # 3) 아직 가져오지 못한 오래된 구간은 마지막으로 가져온 메시지 이전부터 이어서 조회
+        older = []
+        gap = start_time < covered_from
+        if gap:
+            before = self.oldest if self.oldest is not None else discord.Object(id=self.anchor_id)
+            if end_time < covered_from:
+                before = end_time
+            async for message in self.channel.history(limit=None, after=start_time, before=before, oldest_first=True):
+                if not message.author.bot:
+                    older.append((message.created_at.timestamp(), message.author.display_name, message.content))
+
+        if not gap:
+            outcome = "hit"
+        elif cached:
+            outcome = "partial"
+        else:
+            outcome = "miss"
+        metrics.HISTORY_PREFETCH.inc(outcome=outcome)
+        logger.info("히스토리 미리 가져오기 사용: %s (재사용 %s개, 추가 조회 %s개)", outcome, len(cached), len(older) + len(newer))
+        # 호출자에게 넘긴 뒤에는 버퍼를 유지하지 않음
+        self.rows = []
+        self.chars = 0
+        return older + cached + newer
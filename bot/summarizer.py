@@ -0,0 +1,150 @@
+# bot/summarizer.py
+
+import asyncio
+import json
+import logging
+import os
+from enum import Enum
+
+import aiohttp
+
+from bot import metrics
+from bot import transcript
+from bot.logconfig import clip
+
+DEFAULT_GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash-latest:generateContent"
+
+# 청크당 최대 글자 수 (요청 규모 추정에도 사용)
+MAX_CHUNK_SIZE = 2000
+
+
+# 요약 수준을 정의하는 Enum
+class SummaryLevel(Enum):
+    SIMPLE = "간단"
+    DETAILED = "상세"
+
+
+class Summarizer:
+    """
+    Gemini API 를 이용한 청크 요약(map) 및 통합 요약(reduce) 처리.
+    게이트웨이 봇(Cog)과 요약 워커 프로세스가 함께 사용합니다.
+    """
+
+    def __init__(self, transcript_pool=None):
+        self.logger = logging.getLogger('discord_summary_bot.Summarizer')
+        self.gemini_api_key = os.getenv('GEMINI_API_KEY')
+        self.gemini_api_url = os.getenv('GEMINI_API_URL', DEFAULT_GEMINI_API_URL)
+        # 429/5xx 응답 및 네트워크 오류 시 재시도 횟수 (기본값: 재시도 없음)
+        self.gemini_max_retries = int(os.getenv('GEMINI_MAX_RETRIES', '0'))
+        self.transcript_pool = transcript_pool or transcript.TranscriptPool.from_env()
+
+    # 요약 생성 과정을 처리하는 메소드 (재요약에도 사용)
+    async def process_summary(self, conversation: str, summary_level: SummaryLevel) -> str:
+        self.logger.info("요약 처리 과정을 시작합니다.")
+
+        # 대화 내용 분할
+        with metrics.SUMMARY_STAGE_SECONDS.time(stage="chunk"):
+            chunks = await self.transcript_pool.split_text_into_chunks(conversation, MAX_CHUNK_SIZE)
+        metrics.SUMMARY_CHUNKS.observe(len(chunks))
+        self.logger.info("대화 내용을 %s개의 청크로 분할했습니다.", len(chunks))
+
+        # 청크가 하나뿐이면 통합 요약 없이 한 번만 호출 (single-pass)
+        if len(chunks) == 1:
+            with metrics.SUMMARY_STAGE_SECONDS.time(stage="map"):
+                final_summary = await self.generate_summary_gemini(self.chunk_prompt(chunks[0], summary_level))
+            self.logger.info("최종 요약 생성 완료.")
+            return final_summary
+
+        # 각 청크를 요약
+        summarized_chunks = []
+        with metrics.SUMMARY_STAGE_SECONDS.time(stage="map"):
+            for idx, chunk in enumerate(chunks, 1):
+                self.logger.info("청크 %s/%s 요약 중...", idx, len(chunks))
+                summarized_chunk = await self.generate_summary_gemini(self.chunk_prompt(chunk, summary_level))
+                if summarized_chunk:
+                    summarized_chunks.append(summarized_chunk)
+                else:
+                    self.logger.warning("청크 %s 요약 결과가 비어있습니다.", idx)
+
+        return await self.reduce_summaries(summarized_chunks, summary_level)
+
+    @staticmethod
+    def chunk_prompt(chunk: str, summary_level: SummaryLevel) -> str:
+        return f"다음 대화를 {summary_level.value}하게 요약해 주세요. 불필요한 번역이나 해석은 제외하고, 핵심 내용만 포함해 주세요:\n\n{chunk}"
+
+    # 부분 요약들을 통합 요약 (청크 요약 결합 및 저장된 요약의 롤업에 사용)
+    async def reduce_summaries(self, summaries: list, summary_level: SummaryLevel) -> str:
+        combined_summary = "\n".join(summaries)
+        self.logger.debug("결합된 청크 요약: %s", clip(combined_summary))
+
+        # 최종 요약 생성
+        self.logger.info("최종 요약 생성을 위해 결합된 요약을 다시 요약 중...")
+        final_prompt = f"다음 요약들을 통합하여 전체 대화를 {summary_level.value}하게 요약해 주세요:\n\n{combined_summary}"
+        with metrics.SUMMARY_STAGE_SECONDS.time(stage="reduce"):
+            final_summary = await self.generate_summary_gemini(final_prompt)
+        self.logger.info("최종 요약 생성 완료.")
+        return final_summary
+
+    # 긴 텍스트를 청크로 분할하는 메소드
+    def split_text_into_chunks(self, text: str, max_length: int) -> list:
+        self.logger.debug("텍스트를 청크로 분할합니다.")
+        chunks = transcript.split_text_into_chunks(text, max_length)
+        self.logger.debug("텍스트 분할 완료: %s개의 청크", len(chunks))
+        return chunks
+
+    # Google Gemini API를 사용하여 요약 생성
+    async def generate_summary_gemini(self, prompt: str) -> str:
+        self.logger.info("Google Gemini API 호출을 시작합니다.")
+        url_with_key = f"{self.gemini_api_url}?key={self.gemini_api_key}"
+        headers = {
+            "Content-Type": "application/json"
+        }
+        payload = {
+            "prompt": {
+                "text": prompt
+            },
+            "maxOutputTokens": 2048,
+            "temperature": 0.7
+        }
+
+        async with aiohttp.ClientSession() as session:
+            attempt = 0
+            while True:
+                try:
+                    with metrics.GEMINI_REQUEST_SECONDS.time():
+                        async with session.post(url_with_key, headers=headers, json=payload) as response:
+                            response_text = await response.text()
+                            status = response.status
+                    metrics.GEMINI_REQUESTS.inc(status=str(status))
+                    self.logger.debug("Google Gemini API 응답: %s", clip(response_text))
+
+                    if status == 200:
+                        data = json.loads(response_text)
+                        summary = data['candidates'][0]['output']['content'].strip()
+                        usage = data.get('usageMetadata', {})
+                        metrics.GEMINI_TOKENS.inc(usage.get('promptTokenCount', 0), kind="prompt")
+                        metrics.GEMINI_TOKENS.inc(usage.get('candidatesTokenCount', 0), kind="output")
+                        self.logger.info("Google Gemini API 호출이 완료되었습니다.")
+                        self.logger.debug("추출된 요약 내용: %s", clip(summary))
+                        return summary
+                    elif (status == 429 or status >= 500) and attempt < self.gemini_max_retries:
+                        attempt += 1
+                        metrics.GEMINI_RETRIES.inc()
+                        self.logger.warning("Google Gemini API 응답 %s, 재시도 %s/%s", status, attempt, self.gemini_max_retries)
+                        await asyncio.sleep(2 ** attempt)
+                    else:
+                        self.logger.error("Google Gemini API 호출 오류: %s - %s", status, clip(response_text))
+                        raise Exception(f"Google Gemini API 호출 오류: {status} - {clip(response_text)}")
+                except aiohttp.ClientError as e:
+                    metrics.GEMINI_REQUESTS.inc(status="network_error")
+                    if attempt < self.gemini_max_retries:
+                        attempt += 1
+                        metrics.GEMINI_RETRIES.inc()
+                        self.logger.warning("Google Gemini API 네트워크 오류, 재시도 %s/%s: %s", attempt, self.gemini_max_retries, e)
+                        await asyncio.sleep(2 ** attempt)
+                        continue
+                    self.logger.error("Google Gemini API 호출 중 예외 발생: %s", e)
+                    raise e
+                except Exception as e:
+                    self.logger.error("Google Gemini API 호출 중 예외 발생: %s", e)
+                    raise e
@@ -0,0 +1,26 @@
+# bot/tracing.py
+
+import contextvars
+import logging
+import uuid
+
+# 요청 단위 추적 ID (요약 요청 하나의 로그를 묶어 보기 위해 사용)
+trace_id_var = contextvars.ContextVar('trace_id', default='-')
+
+
+def new_trace_id() -> str:
+    trace_id = uuid.uuid4().hex[:12]
+    trace_id_var.set(trace_id)
+    return trace_id
+
+
+def get_trace_id() -> str:
+    return trace_id_var.get()
+
+
+class TraceIdFilter(logging.Filter):
+    """로그 레코드에 현재 컨텍스트의 trace_id 속성을 추가합니다."""
+
+    def filter(self, record):
+        record.trace_id = trace_id_var.get()
+        return True
@@ -0,0 +1,145 @@
+# bot/transcript.py
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+logger = logging.getLogger('discord_summary_bot.transcript')
+
+# 대화 타임스탬프 형식 (UTC)
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+# (timestamp, author, content) 튜플 목록을 대화 줄 목록으로 변환
+# timestamp 는 POSIX 초 단위 float (프로세스 간 전달 비용을 줄이기 위해 datetime 대신 사용)
+def format_lines(rows) -> list:
+    lines = []
+    append = lines.append
+    last_second = None
+    last_stamp = ""
+    for ts, author, content in rows:
+        second = int(ts)
+        # 같은 초에 작성된 메시지는 strftime 결과를 재사용
+        if second != last_second:
+            last_second = second
+            last_stamp = time.strftime(TIMESTAMP_FORMAT, time.gmtime(second))
+        append(f"{last_stamp} | {author}: {content}")
+    return lines
+
+
+def format_messages(rows) -> str:
+    return "\n".join(format_lines(rows))
+
+
+# 긴 텍스트를 max_length 이하의 청크로 분할 (각 청크는 줄바꿈으로 끝남)
+def split_text_into_chunks(text: str, max_length: int) -> list:
+    chunks = []
+    parts = []
+    size = 0
+    for line in text.split('\n'):
+        if size + len(line) + 1 > max_length:
+            if parts:
+                chunks.append("".join(parts))
+            parts = [line, "\n"]
+            size = len(line) + 1
+        else:
+            parts.append(line)
+            parts.append("\n")
+            size += len(line) + 1
+    if parts:
+        chunks.append("".join(parts))
+    return chunks
+
+
+# 긴 텍스트를 임베드 페이지로 분할 (마지막 페이지는 공백 제거)
+def split_text_into_pages(text: str, max_length: int = 2000) -> list:
+    pages = []
+    parts = []
+    size = 0
+    for line in text.split('\n'):
+        if size + len(line) + 1 > max_length:
+            if parts:
+                pages.append("".join(parts))
+            parts = [line, "\n"]
+            size = len(line) + 1
+        else:
+            parts.append(line)
+            parts.append("\n")
+            size += len(line) + 1
+    last_page = "".join(parts)
+    if last_page.strip():
+        pages.append(last_page.strip())
+    return pages
+
+
+class TranscriptPool:
+    """
+    CPU 비용이 큰 대화 처리(포맷팅, 청크/페이지 분할)를 이벤트 루프 밖에서 실행하는 풀.
+    작업 크기가 임계값보다 작으면 풀 전달 비용이 더 크므로 그대로 인라인 실행합니다.
+    """
+
+    def __init__(self, mode="process", max_workers=None, min_messages=2000, min_chars=200_000,
+                 batch_size=5000, start_method="spawn"):
+        if mode not in ("process", "thread", "off"):
+            raise ValueError(f"알 수 없는 TRANSCRIPT_POOL_MODE: {mode}")
+        self.mode = mode
+        self.max_workers = max_workers
+        self.min_messages = min_messages
+        self.min_chars = min_chars
+        self.batch_size = batch_size
+        self.start_method = start_method
+        self._executor = None
+
+    @classmethod
+    def from_env(cls):
+        max_workers = os.getenv('TRANSCRIPT_POOL_WORKERS')
+        return cls(
+            mode=os.getenv('TRANSCRIPT_POOL_MODE', 'process'),
+            max_workers=int(max_workers) if max_workers else None,
+            min_messages=int(os.getenv('TRANSCRIPT_OFFLOAD_MIN_MESSAGES', '2000')),
+            min_chars=int(os.getenv('TRANSCRIPT_OFFLOAD_MIN_CHARS', '200000')),
+            batch_size=int(os.getenv('TRANSCRIPT_BATCH_SIZE', '5000')),
+            start_method=os.getenv('TRANSCRIPT_POOL_START_METHOD', 'spawn'),
+        )
+
+    def _get_executor(self):
+        if self._executor is None:
+            workers = self.max_workers or min(4, os.cpu_count() or 1)
+            if self.mode == "process":
+                # 스레드가 떠 있는 프로세스에서 fork 하지 않도록 기본적으로 spawn 사용
+                context = multiprocessing.get_context(self.start_method)
+                self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="transcript")
+            logger.info("대화 처리 풀 시작: 모드=%s, 워커=%s", self.mode, workers)
+        return self._executor
+
+    async def _run(self, offload: bool, func, *args):
+        if not offload or self.mode == "off":
+            return func(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), func, *args)
+
+    async def format_messages(self, rows) -> str:
+        if len(rows) < self.min_messages or self.mode == "off":
+            return format_messages(rows)
+        # 배치 단위로 나눠 병렬 포맷팅 후 결합 (결합은 C 수준에서 처리되어 저렴함)
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        batches = [rows[i:i + self.batch_size] for i in range(0, len(rows), self.batch_size)]
+        results = await asyncio.gather(*(loop.run_in_executor(executor, format_messages, batch) for batch in batches))
+        return "\n".join(results)
+
+    async def split_text_into_chunks(self, text: str, max_length: int) -> list:
+        return await self._run(len(text) >= self.min_chars, split_text_into_chunks, text, max_length)
+
+    async def split_text_into_pages(self, text: str, max_length: int = 2000) -> list:
+        return await self._run(len(text) >= self.min_chars, split_text_into_pages, text, max_length)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
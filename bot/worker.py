@@ -0,0 +1,176 @@
+# bot/worker.py
+"""
+summary_jobs 큐에서 요약 작업을 가져와 처리하는 워커 프로세스.
+
+    SUMMARY_QUEUE_MODE=queue 로 실행한 게이트웨이 봇이 작업을 등록하고,
+    워커는 게이트웨이와 별도로 원하는 만큼 실행할 수 있습니다.
+
+    python -m bot.worker
+    WORKER_CONCURRENCY=4 python -m bot.worker
+
+작업은 임대(lease) 방식으로 가져오며, 처리 중에는 JOB_LEASE_SECONDS 의 1/3 간격으로 하트비트를 보냅니다.
+워커가 비정상 종료되면 임대가 만료된 뒤 다른 워커가 작업을 다시 가져가며, JOB_MAX_ATTEMPTS 를 넘으면 실패로 처리합니다.
+임대를 잃으면 (게이트웨이의 대기 시간 초과로 취소된 경우 등) 처리 중인 요약을 중단합니다.
+완료/실패한 작업 행은 JOB_RETENTION_SECONDS 가 지나면 삭제합니다.
+SIGTERM/SIGINT 를 받으면 새 작업을 가져오지 않고 진행 중인 작업을 마친 뒤 종료합니다.
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import socket
+
+from dotenv import load_dotenv
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from bot import metrics
+from bot import tracing
+from bot.jobs import JobQueue
+from bot.logconfig import setup_logging
+from bot.models import Base
+from bot.summarizer import Summarizer, SummaryLevel
+
+logger = logging.getLogger('discord_summary_bot.worker')
+
+
+class Worker:
+    def __init__(self, queue: JobQueue, summarizer: Summarizer, worker_id: str, concurrency=1, idle_interval=1.0):
+        self.queue = queue
+        self.summarizer = summarizer
+        self.worker_id = worker_id
+        self.concurrency = concurrency
+        self.idle_interval = idle_interval
+        self.stopping = asyncio.Event()
+        self.processed = 0
+
+    async def run(self):
+        logger.info("워커 시작: %s (동시 처리 %s개)", self.worker_id, self.concurrency)
+        maintenance = asyncio.create_task(self._maintain())
+        try:
+            await asyncio.gather(*(self._slot(index) for index in range(self.concurrency)))
+        finally:
+            maintenance.cancel()
+        logger.info("워커 종료: %s (처리 %s건)", self.worker_id, self.processed)
+
+    # 재시도할 수 없는 만료 작업을 실패 처리하고 오래된 완료/실패 행을 정리 (여러 워커가 실행해도 안전)
+    async def _maintain(self):
+        while not self.stopping.is_set():
+            try:
+                reaped = await self.queue.reap_expired()
+                if reaped:
+                    logger.warning("최대 시도 횟수를 넘긴 만료 작업 %s개를 실패로 처리했습니다.", reaped)
+                purged = await self.queue.purge_finished()
+                if purged:
+                    logger.info("오래된 작업 %s개를 삭제했습니다.", purged)
+            except Exception as e:
+                logger.error("작업 큐 정리 오류: %s", e)
+            try:
+                await asyncio.wait_for(self.stopping.wait(), timeout=self.queue.lease_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _slot(self, index):
+        slot_id = f"{self.worker_id}/{index}"
+        while not self.stopping.is_set():
+            try:
+                job = await self.queue.claim(slot_id)
+            except Exception as e:
+                logger.error("작업 가져오기 오류: %s", e)
+                job = None
+            if job is None:
+                # 대기 중에도 종료 신호에는 즉시 반응
+                try:
+                    await asyncio.wait_for(self.stopping.wait(), timeout=self.idle_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._process(slot_id, job)
+
+    async def _process(self, slot_id, job):
+        tracing.trace_id_var.set(job.trace_id or tracing.new_trace_id())
+        logger.info("작업 %s 처리 시작 (시도 %s/%s)", job.id, job.attempts, job.max_attempts)
+        work = asyncio.create_task(self.summarizer.process_summary(job.conversation, SummaryLevel(job.summary_level)))
+        lease_lost = asyncio.Event()
+        heartbeat = asyncio.create_task(self._heartbeat(slot_id, job.id, work, lease_lost))
+        try:
+            with metrics.SUMMARY_STAGE_SECONDS.time(stage="job"):
+                summary = await work
+        except asyncio.CancelledError:
+            heartbeat.cancel()
+            if not lease_lost.is_set():
+                work.cancel()
+                raise
+            logger.warning("작업 %s: 임대를 잃어 처리를 중단합니다.", job.id)
+            return
+        except Exception as e:
+            heartbeat.cancel()
+            logger.error("작업 %s 처리 오류: %s", job.id, e)
+            if not await self.queue.fail(job.id, slot_id, str(e), job.attempts, job.max_attempts):
+                logger.warning("작업 %s: 임대가 만료되어 실패 기록을 건너뜁니다.", job.id)
+            return
+        heartbeat.cancel()
+        # 빈 요약도 그대로 전달 (게이트웨이에서 '요약 내용이 비어있습니다' 로 안내)
+        if await self.queue.complete(job.id, slot_id, summary or ''):
+            self.processed += 1
+            logger.info("작업 %s 처리 완료", job.id)
+        else:
+            logger.warning("작업 %s: 임대가 만료되어 결과를 버립니다.", job.id)
+
+    async def _heartbeat(self, slot_id, job_id, work, lease_lost):
+        interval = self.queue.lease_seconds / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if not await self.queue.heartbeat(job_id, slot_id):
+                    # 다른 워커가 가져갔거나 취소된 작업이므로 더 이상 API 를 호출하지 않음
+                    logger.warning("작업 %s: 임대를 잃었습니다.", job_id)
+                    lease_lost.set()
+                    work.cancel()
+                    return
+            except Exception as e:
+                logger.error("작업 %s 하트비트 오류: %s", job_id, e)
+
+
+async def main():
+    database_url = os.getenv('DATABASE_URL')
+    engine = create_async_engine(database_url, echo=False)
+    async_session = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    metrics.register_engine(engine)
+
+    if os.getenv('DB_CREATE_ALL', 'true').lower() in ('1', 'true', 'yes'):
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    if os.getenv('METRICS_PORT'):
+        try:
+            await metrics.start_metrics_server(os.getenv('METRICS_HOST', '127.0.0.1'), int(os.getenv('METRICS_PORT')))
+        except OSError as e:
+            logger.error("메트릭 서버 시작 오류: %s", e)
+
+    worker_id = os.getenv('WORKER_ID') or f"{socket.gethostname()}:{os.getpid()}"
+    summarizer = Summarizer()
+    worker = Worker(
+        JobQueue(async_session),
+        summarizer,
+        worker_id,
+        concurrency=int(os.getenv('WORKER_CONCURRENCY', '1')),
+        idle_interval=float(os.getenv('WORKER_IDLE_INTERVAL', '1.0')),
+    )
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stopping.set)
+
+    try:
+        await worker.run()
+    finally:
+        summarizer.transcript_pool.shutdown()
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    load_dotenv()
+    setup_logging(trace_ids=True)
+    asyncio.run(main())
@@ -0,0 +1,166 @@
+"""partition summaries by month
+
+Revision ID: 3f9c2a7d1b04
+Revises:
+Create Date: 2026-10-19 09:00:00.000000
+
+summaries 테이블을 created_at 기준 월별 범위 파티션 테이블로 변환합니다.
+(PostgreSQL 전용. 다른 DB 에서는 created_at 인덱스만 추가합니다.)
+
+- 기존 데이터의 최초 월부터 PARTITION_MONTHS_AHEAD 개월 뒤까지 파티션을 만들고 기본(DEFAULT) 파티션을 추가합니다.
+- 파티션 키가 PK 에 포함되어야 하므로 PK 는 (id, created_at) 이 됩니다. id 는 기존 시퀀스를 계속 사용합니다.
+- 이후 파티션은 봇의 파티션 유지보수 작업(bot/partitions.py)이 미리 생성합니다.
+"""
+import os
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+from bot.partitions import PARENT_TABLE, DEFAULT_PARTITION, month_start, add_months, create_partition_sql
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2a7d1b04'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+COLUMNS = "id, guild_id, channel_id, user_id, start_time, end_time, summary, created_at"
+LEGACY_INDEXES = (
+    'ix_summaries_id', 'ix_summaries_guild_id', 'ix_summaries_channel_id', 'ix_summaries_user_id',
+    'ix_summaries_created_at', 'ix_summaries_user_id_created_at',
+)
+
+
+def _create_indexes():
+    op.create_index('ix_summaries_id', PARENT_TABLE, ['id'])
+    op.create_index('ix_summaries_guild_id', PARENT_TABLE, ['guild_id'])
+    op.create_index('ix_summaries_channel_id', PARENT_TABLE, ['channel_id'])
+    op.create_index('ix_summaries_user_id', PARENT_TABLE, ['user_id'])
+    op.create_index('ix_summaries_created_at', PARENT_TABLE, ['created_at'])
+    op.create_index('ix_summaries_user_id_created_at', PARENT_TABLE, ['user_id', 'created_at'])
+
+
+def _is_partitioned(bind) -> bool:
+    return bind.execute(sa.text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = :name AND pg_table_is_visible(c.oid)"
+    ), {"name": PARENT_TABLE}).scalar() is not None
+
+
+def _move_legacy_table():
+    # 기존 테이블의 인덱스/제약 조건 이름이 새 테이블과 겹치지 않도록 정리
+    op.execute(f"ALTER TABLE {PARENT_TABLE} RENAME TO summaries_legacy")
+    op.execute("ALTER TABLE summaries_legacy RENAME CONSTRAINT summaries_pkey TO summaries_legacy_pkey")
+    for name in LEGACY_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+    # 기존 테이블을 삭제해도 시퀀스가 함께 삭제되지 않도록 소유 관계 해제
+    op.execute("ALTER SEQUENCE summaries_id_seq OWNED BY NONE")
+    op.execute("UPDATE summaries_legacy SET created_at = COALESCE(end_time, start_time, now()) WHERE created_at IS NULL")
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    exists = inspector.has_table(PARENT_TABLE)
+
+    if bind.dialect.name != 'postgresql':
+        if exists:
+            names = {index['name'] for index in inspector.get_indexes(PARENT_TABLE)}
+            if 'ix_summaries_created_at' not in names:
+                op.create_index('ix_summaries_created_at', PARENT_TABLE, ['created_at'])
+            if 'ix_summaries_user_id_created_at' not in names:
+                op.create_index('ix_summaries_user_id_created_at', PARENT_TABLE, ['user_id', 'created_at'])
+        else:
+            op.create_table(
+                PARENT_TABLE,
+                sa.Column('id', sa.Integer(), primary_key=True),
+                sa.Column('guild_id', sa.String()),
+                sa.Column('channel_id', sa.String()),
+                sa.Column('user_id', sa.String()),
+                sa.Column('start_time', sa.DateTime(timezone=True)),
+                sa.Column('end_time', sa.DateTime(timezone=True)),
+                sa.Column('summary', sa.Text()),
+                sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+            )
+            _create_indexes()
+        return
+
+    if exists and _is_partitioned(bind):
+        return
+
+    if exists:
+        _move_legacy_table()
+    else:
+        op.execute("CREATE SEQUENCE IF NOT EXISTS summaries_id_seq")
+
+    op.execute(f"""
+        CREATE TABLE {PARENT_TABLE} (
+            id INTEGER NOT NULL DEFAULT nextval('summaries_id_seq'),
+            guild_id VARCHAR,
+            channel_id VARCHAR,
+            user_id VARCHAR,
+            start_time TIMESTAMP WITH TIME ZONE,
+            end_time TIMESTAMP WITH TIME ZONE,
+            summary TEXT,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            CONSTRAINT summaries_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute(f"ALTER SEQUENCE summaries_id_seq OWNED BY {PARENT_TABLE}.id")
+    _create_indexes()
+
+    now = datetime.now(timezone.utc)
+    first = month_start(now)
+    if exists:
+        oldest = bind.execute(sa.text("SELECT min(created_at) FROM summaries_legacy")).scalar()
+        if oldest is not None:
+            first = min(first, month_start(oldest))
+    last = add_months(month_start(now), int(os.getenv('PARTITION_MONTHS_AHEAD', '3')))
+    month = first
+    while month <= last:
+        op.execute(create_partition_sql(month))
+        month = add_months(month, 1)
+    # 범위를 벗어난 행(미래 시각 등)을 받기 위한 기본 파티션
+    op.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT")
+
+    if exists:
+        op.execute(f"INSERT INTO {PARENT_TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM summaries_legacy")
+        op.execute(f"SELECT setval('summaries_id_seq', GREATEST((SELECT max(id) FROM {PARENT_TABLE}), 1))")
+        op.execute("DROP TABLE summaries_legacy")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        op.drop_index('ix_summaries_user_id_created_at', table_name=PARENT_TABLE)
+        op.drop_index('ix_summaries_created_at', table_name=PARENT_TABLE)
+        return
+
+    if not _is_partitioned(bind):
+        return
+
+    op.execute(f"ALTER TABLE {PARENT_TABLE} RENAME TO summaries_partitioned")
+    op.execute("ALTER TABLE summaries_partitioned RENAME CONSTRAINT summaries_pkey TO summaries_partitioned_pkey")
+    for name in LEGACY_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+    op.execute("ALTER SEQUENCE summaries_id_seq OWNED BY NONE")
+    op.execute(f"""
+        CREATE TABLE {PARENT_TABLE} (
+            id INTEGER NOT NULL DEFAULT nextval('summaries_id_seq'),
+            guild_id VARCHAR,
+            channel_id VARCHAR,
+            user_id VARCHAR,
+            start_time TIMESTAMP WITH TIME ZONE,
+            end_time TIMESTAMP WITH TIME ZONE,
+            summary TEXT,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            CONSTRAINT summaries_pkey PRIMARY KEY (id)
+        )
+    """)
+    op.execute(f"ALTER SEQUENCE summaries_id_seq OWNED BY {PARENT_TABLE}.id")
+    _create_indexes()
+    op.execute(f"INSERT INTO {PARENT_TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM summaries_partitioned")
+    # 파티션도 함께 삭제됨
+    op.execute("DROP TABLE summaries_partitioned")
@@ -0,0 +1,64 @@
+"""create guild_retention and summary_jobs
+
+Revision ID: 8b1e4c6d2a90
+Revises: 3f9c2a7d1b04
+Create Date: 2026-10-19 12:00:00.000000
+
+서버별 보관 기간(guild_retention)과 요약 작업 큐(summary_jobs) 테이블을 생성합니다.
+DB_CREATE_ALL=false 로 운영하는 경우에도 /보관기간, 보관 기간 아카이브, 작업 큐 모드가 동작하도록 합니다.
+(create_all 로 이미 생성된 테이블은 건너뜁니다.)
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b1e4c6d2a90'
+down_revision = '3f9c2a7d1b04'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table('guild_retention'):
+        op.create_table(
+            'guild_retention',
+            sa.Column('guild_id', sa.String(), primary_key=True),
+            sa.Column('retention_days', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('updated_at', sa.DateTime(timezone=True)),
+        )
+
+    if not inspector.has_table('summary_jobs'):
+        op.create_table(
+            'summary_jobs',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('status', sa.String(16)),
+            sa.Column('guild_id', sa.String()),
+            sa.Column('channel_id', sa.String()),
+            sa.Column('user_id', sa.String()),
+            sa.Column('summary_level', sa.String(16)),
+            sa.Column('conversation', sa.Text()),
+            sa.Column('result', sa.Text()),
+            sa.Column('error', sa.Text()),
+            sa.Column('trace_id', sa.String(32)),
+            sa.Column('attempts', sa.Integer()),
+            sa.Column('max_attempts', sa.Integer()),
+            sa.Column('worker_id', sa.String()),
+            sa.Column('available_at', sa.DateTime(timezone=True)),
+            sa.Column('lease_expires_at', sa.DateTime(timezone=True)),
+            sa.Column('created_at', sa.DateTime(timezone=True)),
+            sa.Column('updated_at', sa.DateTime(timezone=True)),
+        )
+        op.create_index('ix_summary_jobs_id', 'summary_jobs', ['id'])
+        op.create_index('ix_summary_jobs_status', 'summary_jobs', ['status'])
+        op.create_index('ix_summary_jobs_guild_id', 'summary_jobs', ['guild_id'])
+
+
+def downgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table('summary_jobs'):
+        op.drop_table('summary_jobs')
+    if inspector.has_table('guild_retention'):
+        op.drop_table('guild_retention')
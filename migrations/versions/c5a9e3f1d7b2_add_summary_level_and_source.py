@@ -0,0 +1,37 @@
+"""add summary_level and source to summaries
+
+Revision ID: c5a9e3f1d7b2
+Revises: 8b1e4c6d2a90
+Create Date: 2026-10-19 15:00:00.000000
+
+요약본에 요약 수준(summary_level)과 생성 방식(source: messages | rollup | resummary)을 기록합니다.
+롤업은 같은 사용자가 같은 수준으로 메시지에서 직접 만든 요약만 재사용합니다.
+기존 행은 NULL 로 남아 롤업에 재사용되지 않습니다. (파티션 테이블은 부모에 추가하면 모든 파티션에 반영됩니다.)
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5a9e3f1d7b2'
+down_revision = '8b1e4c6d2a90'
+branch_labels = None
+depends_on = None
+
+NEW_COLUMNS = ('summary_level', 'source')
+
+
+def upgrade() -> None:
+    # create_all 로 이미 생성된 컬럼은 건너뜀
+    existing = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('summaries')}
+    for name in NEW_COLUMNS:
+        if name not in existing:
+            op.add_column('summaries', sa.Column(name, sa.String(16)))
+
+
+def downgrade() -> None:
+    existing = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('summaries')}
+    with op.batch_alter_table('summaries') as batch_op:
+        for name in NEW_COLUMNS:
+            if name in existing:
+                batch_op.drop_column(name)